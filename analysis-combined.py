@@ -1,20 +1,10 @@
 import os
-import json
-import re
-import glob
+import orjson  # install via: pip install orjson
 import numpy as np
-import matplotlib.pyplot as plt
 import csv
-import brotli
-import hashlib
-from seleniumwire import webdriver  # selenium-wire extends Selenium
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+from xml.sax.saxutils import escape
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from tabulate import tabulate  # install via: pip install tabulate
 
 
@@ -26,45 +16,51 @@ def extract_segments_and_carriers(itinerary_id):
     Assumes itinerary_id is a string starting with "s{num}-c{num}".
     For example, "s3-c1-KL-3390-KL-6149-KL-6126" indicates 3 sections and 1 carrier.
     """
-    match = re.match(r's(\d+)-c(\d+)', itinerary_id)
-    if match:
-        sections = int(match.group(1))
-        carriers = int(match.group(2))
-        return sections, carriers
-    else:
-        return None, None
+    # The prefix is fixed, so a split is enough and avoids the regex engine.
+    try:
+        sections, carriers, *_ = itinerary_id.split("-", 2)
+        if sections[0] == "s" and carriers[0] == "c":
+            return int(sections[1:]), int(carriers[1:])
+    except (ValueError, IndexError):
+        pass
+    return None, None
 
 def load_json(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        return json.load(file)
+    with open(file_path, "rb") as file:
+        return orjson.loads(file.read())
 
 
 # -----------------------------
 # Mapper Functions (Simplify eDO JSON)
 # -----------------------------
-def process_segments(segment_ids, segment_map, section_map, location_map):
+def process_segments(segment_ids, seg_sections, section_map, location_map):
     processed = []
+    # Bind the hot lookups once; missing sections share one empty dict.
+    append = processed.append
+    get_sections = seg_sections.get
+    get_section = section_map.get
+    get_iata = location_map.get
+    empty = {}
     for seg_id in segment_ids:
-        seg_obj = segment_map.get(seg_id)
-        if not seg_obj:
+        entry = get_sections(seg_id)
+        if entry is None:
             continue
-        section_ids = seg_obj.get("segment", {}).get("sections", [])
+        section_ids, seg_carrier = entry
         if not section_ids:
             continue
         for section_id in section_ids:
-            sec_obj = section_map.get(section_id, {})
-            sec = sec_obj.get("section", {})
+            sec = get_section(section_id, empty)
             departure_geo = sec.get("from")
             arrival_geo = sec.get("to")
             departure_time = sec.get("departureDate", "")
             arrival_time = sec.get("arrivalDate", "")
             flight_code = sec.get("flightCode", "")
             carrier_code = flight_code[:2] if flight_code else ""
-            if not carrier_code and seg_obj.get("segment", {}).get("carrier"):
-                carrier_code = str(seg_obj["segment"]["carrier"])
-            departure_iata = location_map.get(departure_geo, "")
-            arrival_iata = location_map.get(arrival_geo, "")
-            processed.append({
+            if not carrier_code and seg_carrier:
+                carrier_code = str(seg_carrier)
+            departure_iata = get_iata(departure_geo, "")
+            arrival_iata = get_iata(arrival_geo, "")
+            append({
                 "sourceStationId": departure_iata,
                 "destinationStationId": arrival_iata,
                 "departureLocalTime": departure_time,
@@ -87,14 +83,27 @@ def simplify_edreams_json(input_filepath, output_filepath):
     data = load_json(input_filepath)
     search_results = data.get("itinerarySearchResults", {})
     itineraries = search_results.get("itineraryResults", [])
+    currency = search_results.get("priceCurrency", "EUR")
     legend = search_results.get("legend", {})
     segment_results = legend.get("segmentResults", [])
     section_results = legend.get("sectionResults", [])
     locations = legend.get("locations", [])
 
-    segment_map = {seg["id"]: seg for seg in segment_results}
-    section_map = {sec["id"]: sec for sec in section_results}
+    # segment id -> (section ids, carrier), resolved once per segment.
+    seg_sections = {}
+    for seg in segment_results:
+        inner = seg.get("segment", {})
+        seg_sections[seg["id"]] = (inner.get("sections", []), inner.get("carrier"))
+    # section id -> only the section fields process_segments reads.
+    section_map = {}
+    for sec in section_results:
+        section = sec.get("section", {})
+        section_map[sec["id"]] = {key: section[key] for key in ("from", "to", "departureDate", "arrivalDate", "flightCode") if key in section}
     location_map = {loc["geoNodeId"]: loc["iataCode"] for loc in locations}
+    # The maps above and `itineraries` hold everything the mapper needs, so
+    # release the rest of the parsed response (legend itineraries, fare
+    # details, full section records) before building the output.
+    del data, search_results, legend, segment_results, section_results, locations
 
     simplified_itineraries = []
 
@@ -103,15 +112,10 @@ def simplify_edreams_json(input_filepath, output_filepath):
         inbound_ids = itinerary.get("secondSegments", [])
         raw_segment_ids = outbound_ids + inbound_ids
 
-        section_count = 0
-        for seg_id in raw_segment_ids:
-            seg_obj = segment_map.get(seg_id)
-            if seg_obj:
-                sections = seg_obj.get("segment", {}).get("sections", [])
-                section_count += len(sections)
+        section_count = sum(len(seg_sections[seg_id][0]) for seg_id in raw_segment_ids if seg_id in seg_sections)
 
-        outbound_segments = process_segments(outbound_ids, segment_map, section_map, location_map)
-        inbound_segments = process_segments(inbound_ids, segment_map, section_map, location_map)
+        outbound_segments = process_segments(outbound_ids, seg_sections, section_map, location_map)
+        inbound_segments = process_segments(inbound_ids, seg_sections, section_map, location_map)
 
         all_segments = outbound_segments + inbound_segments
         itinerary_id = generate_edreams_itinerary_id(itinerary, all_segments, section_count)
@@ -120,53 +124,38 @@ def simplify_edreams_json(input_filepath, output_filepath):
         # Compute price = sortPrice + membershipPerks.fee
         membershipPerks = itinerary.get("membershipPerks", {})
         membership_fee = membershipPerks.get("fee", 0.0)
-        prime_price = float(price_details) + float(membership_fee)
+        # eDO already returns both as JSON numbers, so no float() needed.
+        prime_price = price_details + membership_fee
 
         simplified_itinerary = {
             "id": itinerary_id,
-            "price": price_details,
             "price": prime_price,
-            "currency": search_results.get("priceCurrency", "EUR"),
+            "currency": currency,
             "outbound": outbound_segments,
             "inbound": inbound_segments
         }
         simplified_itineraries.append(simplified_itinerary)
 
-    with open(output_filepath, "w", encoding="utf-8") as file:
-        json.dump(simplified_itineraries, file, indent=4, ensure_ascii=False)
+    with open(output_filepath, "wb") as file:
+        file.write(orjson.dumps(simplified_itineraries, option=orjson.OPT_INDENT_2))
 
     print(f"Simplified JSON saved to {output_filepath}")
 
-# Define mapper file paths.
-input_file = "edreams-response.json"
-output_file = "edreams-simplified.json"
-simplify_edreams_json(input_file, output_file)
-
-
 # -----------------------------
 # Helper Functions for Hub Distribution
 # -----------------------------
-def compute_hub_count(itin):
-    """
-    Compute the hub count for an itinerary.
-    We assume: number of hubs = (number of sections in a leg) - 1.
-    We take the maximum of the outbound and inbound hub counts.
-    """
-    outbound = itin.get("outbound", [])
-    inbound = itin.get("inbound", [])
-    hubs_outbound = len(outbound) - 1 if len(outbound) > 0 else 0
-    hubs_inbound = len(inbound) - 1 if len(inbound) > 0 else 0
-    return max(hubs_outbound, hubs_inbound)
-
 def hub_distribution(itineraries):
     """
     Return a dictionary mapping hub count to frequency for the given itineraries.
+    We assume: number of hubs = (number of sections in a leg) - 1.
+    We take the maximum of the outbound and inbound hub counts.
     """
-    dist = {}
-    for itin in itineraries:
-        count = compute_hub_count(itin)
-        dist[count] = dist.get(count, 0) + 1
-    return dist
+    n = len(itineraries)
+    outbound_lens = np.fromiter((len(itin.get("outbound", [])) for itin in itineraries), dtype=np.int32, count=n)
+    inbound_lens = np.fromiter((len(itin.get("inbound", [])) for itin in itineraries), dtype=np.int32, count=n)
+    hub_counts = np.maximum(np.maximum(outbound_lens - 1, 0), np.maximum(inbound_lens - 1, 0))
+    hist = np.bincount(hub_counts)
+    return {count: int(freq) for count, freq in enumerate(hist) if freq}
 
 def format_distribution(dist, total):
     """
@@ -175,6 +164,53 @@ def format_distribution(dist, total):
     """
     return ", ".join(f"{k}: {v} ({100*v/total:.2f}%)" for k, v in sorted(dist.items()))
 
+def index_itineraries(itineraries):
+    """
+    Walk each itinerary's segments once and return a list of
+    {"id", "price", "all_segs", "stations", "flights", "carriers"} entries.
+    "all_segs" is the outbound+inbound segments as a tuple and the last three
+    are frozensets, so later hub/flight/carrier checks are set operations.
+    Prices are expected to be floats already (see analyze_journey).
+    """
+    index = []
+    for itin in itineraries:
+        all_segs = tuple(itin.get("outbound", []) + itin.get("inbound", []))
+        stations = set()
+        flights = set()
+        carriers = set()
+        for seg in all_segs:
+            if seg.get("sourceStationId"):
+                stations.add(seg["sourceStationId"])
+            if seg.get("destinationStationId"):
+                stations.add(seg["destinationStationId"])
+            if seg.get("carrierCode"):
+                carriers.add(seg["carrierCode"])
+                if seg.get("flightCode"):
+                    flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
+        index.append({
+            "id": itin["id"],
+            "price": itin["price"],
+            "all_segs": all_segs,
+            "stations": frozenset(stations),
+            "flights": frozenset(flights),
+            "carriers": frozenset(carriers)
+        })
+    return index
+
+def intern_codes(index, key, code_ids):
+    """
+    Pack the `key` frozensets of an itinerary index into CSR form: a flat
+    int32 array of code ids (interned through the code_ids dict, which is
+    filled in as new codes appear) plus per-itinerary offsets into it.
+    """
+    values = []
+    offsets = [0]
+    for it in index:
+        for code in it[key]:
+            values.append(code_ids.setdefault(code, len(code_ids)))
+        offsets.append(len(values))
+    return np.array(values, dtype=np.int32), np.array(offsets, dtype=np.int32)
+
 
 # -----------------------------
 # Analysis Script with Hub, Missing Flights, Constructible Analysis, and Hubs Distribution
@@ -188,18 +224,31 @@ def analyze_journey(folder):
     kiwi_data = load_json(kiwi_file)
     edreams_data = load_json(edreams_file)
 
-    # Deduplicate Kiwi itineraries (by ID) to avoid repeated content.
+    # Kiwi stores prices as strings; coerce every price to float once here
+    # (Kiwi rows in the dedup pass below) so later code uses them as numbers.
+    for entry in edreams_data:
+        entry["price"] = float(entry["price"])
+
+    # Deduplicate Kiwi itineraries (by ID) to avoid repeated content,
+    # keeping the cheapest entry for each ID. This is the only dedup pass;
+    # everything below reuses unique_kiwi and kiwi_price_by_id.
     unique_kiwi_dict = {}
+    kiwi_price_by_id = {}
     for it in kiwi_data:
         it_id = it["id"]
-        it_price = float(it["price"])
-        if it_id not in unique_kiwi_dict or it_price < float(
-            unique_kiwi_dict[it_id]["price"]):
+        it_price = it["price"] = float(it["price"])
+        current_price = kiwi_price_by_id.get(it_id)
+        if current_price is None or it_price < current_price:
+            kiwi_price_by_id[it_id] = it_price
             unique_kiwi_dict[it_id] = it
     unique_kiwi = list(unique_kiwi_dict.values())
     total_unique_kiwi = len(unique_kiwi)
     print(total_unique_kiwi)
 
+    # Precompute station/flight/carrier sets per itinerary.
+    kiwi_index = index_itineraries(unique_kiwi)
+    edreams_index = index_itineraries(edreams_data)
+
     kiwi_itinerary_ids = {entry["id"] for entry in unique_kiwi}
     edreams_itinerary_ids = {entry["id"] for entry in edreams_data}
 
@@ -207,98 +256,78 @@ def analyze_journey(folder):
     missing_in_edreams = kiwi_itinerary_ids - edreams_itinerary_ids
 
     # Use price for eDO comparisons.
-    cheapest_edreams_price = min(float(entry["price"]) for entry in edreams_data)
-    cheapest_kiwi_price = min(float(entry["price"]) for entry in kiwi_data)
-
-    cheaper_than_edo_cheapest_itineraries = [entry["id"] for entry in kiwi_data if float(entry["price"]) < cheapest_edreams_price]
-    cheaper_than_edo_cheapest_count = len(cheaper_than_edo_cheapest_itineraries)
+    # Parallel price/ID arrays so the filters below run as single NumPy passes.
+    edreams_prices = np.fromiter((entry["price"] for entry in edreams_data), dtype=np.float64, count=len(edreams_data))
+    kiwi_prices = np.fromiter((entry["price"] for entry in kiwi_data), dtype=np.float64, count=len(kiwi_data))
+    kiwi_ids = np.array([entry["id"] for entry in kiwi_data], dtype=object)
+
+    cheapest_edreams_price = float(edreams_prices.min())
+    cheapest_kiwi_price = float(kiwi_prices.min())
+
+    cheap_mask = kiwi_prices < cheapest_edreams_price
+    # Set for O(1) membership tests; the count keeps duplicated Kiwi rows.
+    cheaper_than_edo_cheapest_itineraries = set(kiwi_ids[cheap_mask].tolist())
+    cheaper_than_edo_cheapest_count = int(np.sum(cheap_mask))
     print(cheaper_than_edo_cheapest_count)
     percent_over_kiwi = 100 * cheaper_than_edo_cheapest_count / total_unique_kiwi if total_unique_kiwi else 0
     percent_over_edreams = 100 * cheaper_than_edo_cheapest_count / len(edreams_itinerary_ids) if edreams_itinerary_ids else 0
     cheaper_than_edo_cheapest_str = f"{cheaper_than_edo_cheapest_count} ({percent_over_kiwi:.2f}% of Kiwi, {percent_over_edreams:.2f}% of eDO)"
 
-    eDreams_cheaper_count = 0
-    kiwi_cheaper_count = 0
-    price_diff_sum = 0
-    eDreams_cheaper_diffs = []
-    kiwi_cheaper_diffs = []
-    for itinerary_id in repeated_itineraries:
-        edreams_price = float(next(entry["price"] for entry in edreams_data if entry["id"] == itinerary_id))
-        kiwi_price = float(next(entry["price"] for entry in unique_kiwi if entry["id"] == itinerary_id))
-        price_diff = edreams_price - kiwi_price
-        price_diff_sum += price_diff
-        if edreams_price < kiwi_price:
-            eDreams_cheaper_count += 1
-            eDreams_cheaper_diffs.append(kiwi_price - edreams_price)
-        elif kiwi_price < edreams_price:
-            kiwi_cheaper_count += 1
-            kiwi_cheaper_diffs.append(edreams_price - kiwi_price)
-    total_repeated = len(repeated_itineraries)
+    # Index prices by ID once; the first eDO entry wins for duplicated IDs.
+    edreams_price_by_id = {}
+    for entry in edreams_data:
+        edreams_price_by_id.setdefault(entry["id"], entry["price"])
+    # Paired eDO/Kiwi prices for the repeated itineraries.
+    repeated_ids = list(repeated_itineraries)
+    total_repeated = len(repeated_ids)
+    repeated_edreams_prices = np.fromiter((edreams_price_by_id[i] for i in repeated_ids), dtype=np.float64, count=total_repeated)
+    repeated_kiwi_prices = np.fromiter((kiwi_price_by_id[i] for i in repeated_ids), dtype=np.float64, count=total_repeated)
+    price_diffs = repeated_edreams_prices - repeated_kiwi_prices
+    eDreams_cheaper_diffs = -price_diffs[price_diffs < 0]
+    kiwi_cheaper_diffs = price_diffs[price_diffs > 0]
+    eDreams_cheaper_count = int(eDreams_cheaper_diffs.size)
+    kiwi_cheaper_count = int(kiwi_cheaper_diffs.size)
     percent_eDreams_cheaper_repeated = (100 * eDreams_cheaper_count / total_repeated) if total_repeated else 0
     percent_kiwi_cheaper_repeated = (100 * kiwi_cheaper_count / total_repeated) if total_repeated else 0
-    overall_avg_price_diff = (price_diff_sum / total_repeated) if total_repeated else 0
-    avg_diff_eDreams_cheaper = (sum(eDreams_cheaper_diffs) / len(eDreams_cheaper_diffs)) if eDreams_cheaper_diffs else 0
-    avg_diff_kiwi_cheaper = (sum(kiwi_cheaper_diffs) / len(kiwi_cheaper_diffs)) if kiwi_cheaper_diffs else 0
+    overall_avg_price_diff = float(price_diffs.mean()) if total_repeated else 0
+    avg_diff_eDreams_cheaper = float(eDreams_cheaper_diffs.mean()) if eDreams_cheaper_count else 0
+    avg_diff_kiwi_cheaper = float(kiwi_cheaper_diffs.mean()) if kiwi_cheaper_count else 0
 
     not_repeated_kiwi = kiwi_itinerary_ids - repeated_itineraries
     count_cheaper_non_repeated_kiwi = sum(
-        1 for entry in unique_kiwi if entry["id"] in not_repeated_kiwi and float(entry["price"]) < cheapest_edreams_price
+        1 for it_id in not_repeated_kiwi if kiwi_price_by_id[it_id] < cheapest_edreams_price
     )
     kiwi_cheaper_total = count_cheaper_non_repeated_kiwi + kiwi_cheaper_count
     total_unique_itineraries = total_unique_kiwi + len(edreams_itinerary_ids) - len(repeated_itineraries)
     percent_kiwi_cheaper_overall = 100 * kiwi_cheaper_total / total_unique_itineraries
 
     # ----- Hub (Location) Analysis -----
-    kiwi_locations = set()
-    for itin in unique_kiwi:
-        for seg in itin.get("outbound", []):
-            if seg.get("sourceStationId"):
-                kiwi_locations.add(seg["sourceStationId"])
-            if seg.get("destinationStationId"):
-                kiwi_locations.add(seg["destinationStationId"])
-        for seg in itin.get("inbound", []):
-            if seg.get("sourceStationId"):
-                kiwi_locations.add(seg["sourceStationId"])
-            if seg.get("destinationStationId"):
-                kiwi_locations.add(seg["destinationStationId"])
-    edo_locations = set()
-    for itin in edreams_data:
-        for seg in itin.get("outbound", []):
-            if seg.get("sourceStationId"):
-                edo_locations.add(seg["sourceStationId"])
-            if seg.get("destinationStationId"):
-                edo_locations.add(seg["destinationStationId"])
-        for seg in itin.get("inbound", []):
-            if seg.get("sourceStationId"):
-                edo_locations.add(seg["sourceStationId"])
-            if seg.get("destinationStationId"):
-                edo_locations.add(seg["destinationStationId"])
-    missing_locations = kiwi_locations - edo_locations
+    kiwi_locations = set().union(*(it["stations"] for it in kiwi_index))
+    edo_locations = set().union(*(it["stations"] for it in edreams_index))
+    # Frozen so every hub check below is one set operation against it.
+    missing_locations = frozenset(kiwi_locations - edo_locations)
     missing_locations_count = len(missing_locations)
     missing_locations_str = ", ".join(sorted(missing_locations))
 
+    # Intern Kiwi stations to int32 ids so hub usage is counted with
+    # bincount over the flat station array instead of one pass per hub.
+    station_ids = {}
+    station_values, station_offsets = intern_codes(kiwi_index, "stations", station_ids)
+    station_owner = np.repeat(np.arange(len(kiwi_index)), np.diff(station_offsets))
+    is_cheap_itin = np.array([it["id"] in cheaper_than_edo_cheapest_itineraries for it in kiwi_index], dtype=bool)
+    is_missing_station = np.zeros(len(station_ids), dtype=bool)
+    is_missing_station[[station_ids[hub] for hub in missing_locations]] = True
+    station_usage = np.bincount(station_values, minlength=len(station_ids))
+    station_cheaper_usage = np.bincount(station_values[is_cheap_itin[station_owner]], minlength=len(station_ids))
+    uses_missing_hub = np.bincount(station_owner[is_missing_station[station_values]], minlength=len(kiwi_index)) > 0
+
     # Hub breakdown: For each missing hub, count usage and cheaper usage.
     hub_breakdown = []
     missing_hub_usage = {}
     missing_hub_cheaper_usage = {}
     for hub in missing_locations:
-        usage = 0
-        cheaper_usage = 0
-        for itin in unique_kiwi:
-            uses_hub = False
-            for seg in itin.get("outbound", []):
-                if seg.get("sourceStationId") == hub or seg.get("destinationStationId") == hub:
-                    uses_hub = True
-                    break
-            if not uses_hub:
-                for seg in itin.get("inbound", []):
-                    if seg.get("sourceStationId") == hub or seg.get("destinationStationId") == hub:
-                        uses_hub = True
-                        break
-            if uses_hub:
-                usage += 1
-                if itin["id"] in cheaper_than_edo_cheapest_itineraries:
-                    cheaper_usage += 1
+        usage = int(station_usage[station_ids[hub]])
+        cheaper_usage = int(station_cheaper_usage[station_ids[hub]])
         missing_hub_usage[hub] = usage
         missing_hub_cheaper_usage[hub] = cheaper_usage
         hub_breakdown.append({
@@ -321,96 +350,62 @@ def analyze_journey(folder):
     edreams_cheaper_repeated_str = f"{eDreams_cheaper_count} ({percent_eDreams_cheaper_repeated:.2f}%)"
 
     # ----- New Missing Hub Itinerary Count (Overall) -----
-    itins_with_missing_hub = set()
-    for itin in unique_kiwi:
-        for seg in itin.get("outbound", []) + itin.get("inbound", []):
-            if seg.get("sourceStationId") in missing_locations or seg.get("destinationStationId") in missing_locations:
-                itins_with_missing_hub.add(itin["id"])
-                break
-    missing_hub_itinerary_count = len(itins_with_missing_hub)
+    missing_hub_itinerary_count = int(np.sum(uses_missing_hub))
     missing_hub_itinerary_pct = 100 * missing_hub_itinerary_count / total_unique_kiwi if total_unique_kiwi else 0
     missing_hub_itinerary_str = f"{missing_hub_itinerary_count} ({missing_hub_itinerary_pct:.2f}%)"
 
     # ----- New Missing Hub Cheaper Itinerary Count (Overall) -----
-    itins_with_missing_hub_cheaper = set()
-    for itin in unique_kiwi:
-        for seg in itin.get("outbound", []) + itin.get("inbound", []):
-            if seg.get("sourceStationId") in missing_locations or seg.get("destinationStationId") in missing_locations:
-                if itin["id"] in cheaper_than_edo_cheapest_itineraries:
-                    itins_with_missing_hub_cheaper.add(itin["id"])
-                    break
-    missing_hub_cheaper_itinerary_count = len(itins_with_missing_hub_cheaper)
+    missing_hub_cheaper_itinerary_count = int(np.sum(uses_missing_hub & is_cheap_itin))
     missing_hub_cheaper_itinerary_pct = 100 * missing_hub_cheaper_itinerary_count / cheaper_than_edo_cheapest_count if cheaper_than_edo_cheapest_count else 0
     missing_hub_cheaper_itinerary_str = f"{missing_hub_cheaper_itinerary_count} ({missing_hub_cheaper_itinerary_pct:.2f}%)"
 
     # ----- Missing Flights Analysis for Missing Itineraries -----
+    # Carriers are collected alongside the flights for the carrier analysis.
     kiwi_missing_flights = set()
-    for itin in unique_kiwi:
-        if itin["id"] in missing_in_edreams:
-            for seg in itin.get("outbound", []):
-                if seg.get("carrierCode") and seg.get("flightCode"):
-                    kiwi_missing_flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
-            for seg in itin.get("inbound", []):
+    kiwi_missing_carriers = set()
+    for it in kiwi_index:
+        if it["id"] in missing_in_edreams:
+            for seg in it["all_segs"]:
                 if seg.get("carrierCode") and seg.get("flightCode"):
                     kiwi_missing_flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
+                    kiwi_missing_carriers.add(seg["carrierCode"])
     edreams_flights = set()
-    for itin in edreams_data:
-        for seg in itin.get("outbound", []):
-            if seg.get("carrierCode") and seg.get("flightCode"):
-                edreams_flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
-        for seg in itin.get("inbound", []):
-            if seg.get("carrierCode") and seg.get("flightCode"):
-                edreams_flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
+    for it in edreams_index:
+        edreams_flights.update(it["flights"])
     missing_flights = kiwi_missing_flights - edreams_flights
     missing_flights_str = ", ".join(sorted(missing_flights))
 
     # ----- Constructible Analysis for Missing Itineraries -----
-    constructible_count = 0
-    for itin in unique_kiwi:
-        if itin["id"] in missing_in_edreams:
-            kiwi_flights = set()
-            for seg in itin.get("outbound", []) + itin.get("inbound", []):
-                if seg.get("carrierCode") and seg.get("flightCode"):
-                    kiwi_flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
-            if kiwi_flights and kiwi_flights.issubset(edreams_flights):
-                constructible_count += 1
+    constructible_count = sum(
+        1 for it in kiwi_index
+        if it["id"] in missing_in_edreams and it["flights"] and it["flights"].issubset(edreams_flights)
+    )
     constructible_pct = 100 * constructible_count / len(missing_in_edreams) if missing_in_edreams else 0
     constructible_str = f"{constructible_count} ({constructible_pct:.2f}%)"
 
     # ----- Constructible Analysis for Cheap Kiwi Itineraries -----
-    cheap_kiwi_itins = [itin for itin in unique_kiwi if float(itin["price"]) < cheapest_edreams_price]
-    constructible_cheap_count = 0
-    for itin in cheap_kiwi_itins:
-        kiwi_flights = set()
-        for seg in itin.get("outbound", []) + itin.get("inbound", []):
-            if seg.get("carrierCode") and seg.get("flightCode"):
-                kiwi_flights.add(f"{seg['carrierCode']}{seg['flightCode']}")
-        if kiwi_flights and kiwi_flights.issubset(edreams_flights):
-            constructible_cheap_count += 1
+    cheap_kiwi_itins = [it for it in kiwi_index if it["price"] < cheapest_edreams_price]
+    constructible_cheap_count = sum(1 for it in cheap_kiwi_itins if it["flights"] and it["flights"].issubset(edreams_flights))
     constructible_cheap_pct = 100 * constructible_cheap_count / len(cheap_kiwi_itins) if cheap_kiwi_itins else 0
     constructible_cheap_str = f"{constructible_cheap_count} ({constructible_cheap_pct:.2f}%)"
 
     # ----- New Analysis: Cheap Kiwi Itineraries with FR Flights (Overall) -----
-    cheap_kiwi_with_FR_count = 0
-    for itin in cheap_kiwi_itins:
-        if any(seg.get("carrierCode") == "FR" for seg in (itin.get("outbound", []) + itin.get("inbound", []))):
-            cheap_kiwi_with_FR_count += 1
+    cheap_kiwi_with_FR_count = sum(1 for it in cheap_kiwi_itins if "FR" in it["carriers"])
     cheap_kiwi_total = len(cheap_kiwi_itins)
     cheap_kiwi_with_FR_pct = 100 * cheap_kiwi_with_FR_count / cheap_kiwi_total if cheap_kiwi_total else 0
 
     # ----- New Analysis: Cheap Missing NonHub with FR Flights -----
     # Among the cheap missing itineraries that are NOT missing due to hub issues:
-    cheap_missing = [itin for itin in cheap_kiwi_itins if itin["id"] in missing_in_edreams]
-    cheap_missing_hub = [itin for itin in cheap_missing if any(
-        seg.get("sourceStationId") in missing_locations or seg.get("destinationStationId") in missing_locations
-        for seg in (itin.get("outbound", []) + itin.get("inbound", []))
-    )]
-    cheap_missing_nonhub = [itin for itin in cheap_missing if itin not in cheap_missing_hub]
+    cheap_missing = [it for it in cheap_kiwi_itins if it["id"] in missing_in_edreams]
+    cheap_missing_hub = []
+    cheap_missing_nonhub = []
+    for it in cheap_missing:
+        if missing_locations.isdisjoint(it["stations"]):
+            cheap_missing_nonhub.append(it)
+        else:
+            cheap_missing_hub.append(it)
     cheap_missing_nonhub_count = len(cheap_missing_nonhub)
-    cheap_missing_nonhub_with_FR_count = 0
-    for itin in cheap_missing_nonhub:
-        if any(seg.get("carrierCode") == "FR" for seg in (itin.get("outbound", []) + itin.get("inbound", []))):
-            cheap_missing_nonhub_with_FR_count += 1
+    cheap_missing_nonhub_with_FR_count = sum(1 for it in cheap_missing_nonhub if "FR" in it["carriers"])
     cheap_missing_nonhub_with_FR_pct = 100 * cheap_missing_nonhub_with_FR_count / cheap_missing_nonhub_count if cheap_missing_nonhub_count else 0
     cheap_missing_nonhub_with_FR_str = f"{cheap_missing_nonhub_with_FR_count} ({cheap_missing_nonhub_with_FR_pct:.2f}%)"
 
@@ -429,17 +424,13 @@ def analyze_journey(folder):
     }
 
     # ----- Missing Carrier Analysis -----
-    # (We assume missing_flights is defined below.)
-    missing_flights_carriers = {f[:2] for f in missing_flights}  # first two characters as carrier code.
+    # A carrier eDO never shows cannot own any eDO flight, so subtracting
+    # edreams_carriers from the raw missing-itinerary carriers gives the same
+    # result as projecting carriers out of missing_flights.
     edreams_carriers = set()
-    for itin in edreams_data:
-        for seg in itin.get("outbound", []):
-            if seg.get("carrierCode"):
-                edreams_carriers.add(seg["carrierCode"])
-        for seg in itin.get("inbound", []):
-            if seg.get("carrierCode"):
-                edreams_carriers.add(seg["carrierCode"])
-    missing_carriers = missing_flights_carriers - edreams_carriers
+    for it in edreams_index:
+        edreams_carriers.update(it["carriers"])
+    missing_carriers = kiwi_missing_carriers - edreams_carriers
     missing_carriers_str = ", ".join(sorted(missing_carriers))
     missing_carriers_count = len(missing_carriers)
 
@@ -449,12 +440,10 @@ def analyze_journey(folder):
     missing_hub_cities_pct = 100 * missing_locations_count / (total_unique_cities - 2) if total_unique_cities > 2 else 0
 
     # ----- NEW: Hubs Distribution Calculation (on Unique Kiwi Itineraries) -----
-    unique_kiwi = list({it["id"]: it for it in kiwi_data}.values())
-    total_unique_kiwi = len(unique_kiwi)
     all_hub_dist = hub_distribution(unique_kiwi)
     formatted_all_hub_dist = format_distribution(all_hub_dist, total_unique_kiwi)
 
-    unique_cheap = list({it["id"]: it for it in kiwi_data if float(it["price"]) < cheapest_edreams_price}.values())
+    unique_cheap = [it for it in unique_kiwi if kiwi_price_by_id[it["id"]] < cheapest_edreams_price]
     total_unique_cheap = len(unique_cheap)
     cheap_hub_dist = hub_distribution(unique_cheap)
     formatted_cheap_hub_dist = format_distribution(cheap_hub_dist, total_unique_cheap)
@@ -500,220 +489,283 @@ def analyze_journey(folder):
     return results
 
 
-# -----------------------------
-# Main: Process Test Folders, Build Tables and Export Graphs
-# -----------------------------
-test_folders = ["test1", "test2", "test3", "test4"]
-
-all_results = []
-hub_breakdown_all = []
-cheap_analysis_table = []  # New table for deep cheap analysis
-hubs_distribution_table = []  # New table for hubs distribution
-for folder in test_folders:
-    if os.path.isdir(folder):
-        result = analyze_journey(folder)
-        all_results.append(result)
-        for hub_info in result.get("Hub Breakdown", []):
-            hub_breakdown_all.append([result["Journey"], hub_info["Hub"], hub_info["Usage"], hub_info["Cheaper Usage"]])
-        ca = result.get("Cheap Analysis", {})
-        cheap_analysis_table.append([
-            result["Journey"],
-            ca.get("Total Cheap Kiwi", ""),
-            ca.get("Cheap Missing Count", ""),
-            ca.get("Cheap Missing Due to Hub", ""),
-            ca.get("Cheap Missing Not Due to Hub", ""),
-            ca.get("Cheap Missing NonHub with FR Flights", ""),
-            ca.get("Cheaper Kiwi with FR Flights", "")
-        ])
-        hubs_distribution_table.append([
-            result["Journey"],
-            result.get("Hubs Distribution (All Kiwi)", ""),
-            result.get("Hubs Distribution (Cheap Kiwi)", "")
-        ])
-    else:
-        print(f"Folder {folder} not found.")
-
-# Define table headers.
-content_headers = [
-    "Journey", "Departure", "Arrival",
-    "Total Kiwi", "Total eDreams",
-    "Repeated", "Repeated %", "Missing Content in eDO",
-    "Missing Flights", "Constructible", "Constructible among Cheap Kiwi",
-    "Missing Carriers", "Missing Carriers Count",
-    "Cheaper Kiwi with FR Flights"
-]
-
-global_pricing_headers = [
-    "Journey",
-    "Kiwi itineraries cheaper the eDO cheapest",
-    "Cheapest eDreams", "Cheapest Kiwi",
-    "Overall % of itineraries were Kiwi was cheaper"
-]
-
-repeated_pricing_headers = [
-    "Journey",
-    "Kiwi cheaper", "eDreams cheaper",
-    "Overall Avg Price Diff",
-    "Avg Diff when eDreams Cheaper", "Avg Diff when Kiwi Cheaper"
-]
-
-hub_data_headers = [
-    "Journey",
-    "Missing Hub Cities in eDO",
-    "Missing Hub Cities Count",
-    "Missing Cheaper Hubs Count",
-    "Missing Hub Itinerary Count",
-    "Missing Hub Cheaper Itinerary Count"
-]
-
-hub_breakdown_headers = ["Journey", "Hub", "Usage", "Cheaper Usage"]
-
-cheap_analysis_headers = [
-    "Journey",
-    "Total Cheap Kiwi",
-    "Cheap Missing Count",
-    "Cheap Missing Due to Hub",
-    "Cheap Missing Not Due to Hub",
-    "Cheap Missing NonHub with FR Flights",
-    "Cheaper Kiwi with FR Flights"
-]
-
-hubs_distribution_headers = [
-    "Journey",
-    "Hubs Distribution (All Kiwi)",
-    "Hubs Distribution (Cheap Kiwi)"
-]
-
-# Build the tables.
-content_table = [[res[h] for h in content_headers] for res in all_results]
-global_pricing_table = [[res[h] for h in global_pricing_headers] for res in all_results]
-repeated_pricing_table = [[res[h] for h in repeated_pricing_headers] for res in all_results]
-hub_data_table = [[res["Journey"],
-                   res["Missing Hub Cities in eDO"],
-                   res["Missing Hub Cities Count"],
-                   res["Missing Cheaper Hubs Count"],
-                   res["Missing Hub Itinerary Count"],
-                   res["Missing Hub Cheaper Itinerary Count"]]
-                  for res in all_results]
-hub_breakdown_table = []
-for res in all_results:
-    journey = res["Journey"]
-    for hub_info in res.get("Hub Breakdown", []):
-        hub_breakdown_table.append([journey, hub_info["Hub"], hub_info["Usage"], hub_info["Cheaper Usage"]])
-cheap_analysis_table_final = cheap_analysis_table
-hubs_distribution_table_final = hubs_distribution_table
-
-print("\nContent Related Data:")
-print(tabulate(content_table, headers=content_headers, tablefmt="grid"))
-print("\nGlobal Pricing Data:")
-print(tabulate(global_pricing_table, headers=global_pricing_headers, tablefmt="grid"))
-print("\nRepeated Pricing Data:")
-print(tabulate(repeated_pricing_table, headers=repeated_pricing_headers, tablefmt="grid"))
-print("\nHigh-Level Hub Data:")
-print(tabulate(hub_data_table, headers=hub_data_headers, tablefmt="grid"))
-print("\nHub Breakdown Data:")
-print(tabulate(hub_breakdown_table, headers=hub_breakdown_headers, tablefmt="grid"))
-print("\nCheap Analysis Data:")
-print(tabulate(cheap_analysis_table_final, headers=cheap_analysis_headers, tablefmt="grid"))
-print("\nHubs Distribution Data:")
-print(tabulate(hubs_distribution_table_final, headers=hubs_distribution_headers, tablefmt="grid"))
-
-# Export tables to CSV.
+# Export tables to CSV. A 1 MB buffer lets each table go out in a few
+# large writes instead of one syscall per 8 KB.
 def export_to_csv(filename, headers, table_data):
-    with open(filename, "w", newline="") as csvfile:
+    with open(filename, "w", newline="", buffering=1024 * 1024) as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(headers)
         writer.writerows(table_data)
 
-export_to_csv("outputs/content_data.csv", content_headers, content_table)
-export_to_csv("outputs/global_pricing_data.csv", global_pricing_headers, global_pricing_table)
-export_to_csv("outputs/repeated_pricing_data.csv", repeated_pricing_headers, repeated_pricing_table)
-export_to_csv("outputs/hub_data.csv", hub_data_headers, hub_data_table)
-export_to_csv("outputs/hub_breakdown_data.csv", hub_breakdown_headers, hub_breakdown_table)
-export_to_csv("outputs/cheap_analysis_data.csv", cheap_analysis_headers, cheap_analysis_table_final)
-export_to_csv("outputs/hubs_distribution_data.csv", hubs_distribution_headers, hubs_distribution_table_final)
-
-print("\nCSV files 'content_data.csv', 'global_pricing_data.csv', 'repeated_pricing_data.csv', 'hub_data.csv', 'hub_breakdown_data.csv', 'cheap_analysis_data.csv', and 'hubs_distribution_data.csv' have been saved.")
+# Print a table as tab-separated lines; used for the long per-row tables
+# where grid formatting is not worth its cost.
+def print_table(headers, table_data):
+    write = sys.stdout.write
+    write("\t".join(map(str, headers)) + "\n")
+    for row in table_data:
+        write("\t".join(map(str, row)) + "\n")
 
 # -----------------------------
 # Graph Export Functions
 # -----------------------------
-os.makedirs("plots", exist_ok=True)
-
-def save_graphs(folder, kiwi_data, edreams_data):
-    metadata = load_json(os.path.join(folder, "metadata.json"))
-    journey = metadata.get("journey", folder)
-    edreams_prices = [float(entry["price"]) for entry in edreams_data]
-    kiwi_prices = [float(entry["price"]) for entry in kiwi_data]
-    plt.figure(figsize=(10, 6))
-    bins = 30
-    plt.hist(edreams_prices, bins=bins, color='blue', alpha=0.6, label='eDO (price)')
-    plt.hist(kiwi_prices, bins=bins, color='green', alpha=0.6, label='Kiwi')
-    plt.xlabel('Price')
-    plt.ylabel('Frequency')
-    plt.title(f'Price Distribution - {journey}')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(os.path.join("plots", f"{folder}_price_distribution.png"))
-    plt.close()
-
-def save_section_distribution(folder, kiwi_data, edreams_data):
-    metadata = load_json(os.path.join(folder, "metadata.json"))
-    journey = metadata.get("journey", folder)
-    kiwi_sections = []
-    edreams_sections = []
-    for entry in kiwi_data:
-        res = extract_segments_and_carriers(entry["id"])
-        if res:
-            kiwi_sections.append(res[0])
-    for entry in edreams_data:
-        res = extract_segments_and_carriers(entry["id"])
-        if res:
-            edreams_sections.append(res[0])
-    plt.figure(figsize=(10,6))
-    bins = range(min(kiwi_sections+edreams_sections), max(kiwi_sections+edreams_sections)+2)
-    plt.hist(kiwi_sections, bins=bins, color='green', alpha=0.6, label='Kiwi')
-    plt.hist(edreams_sections, bins=bins, color='blue', alpha=0.6, label='eDO')
-    plt.xlabel('Number of Sections')
-    plt.ylabel('Frequency')
-    plt.title(f'Section Distribution - {journey}')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(os.path.join("plots", f"{folder}_section_distribution.png"))
-    plt.close()
-
-def save_carrier_distribution(folder, kiwi_data, edreams_data):
-    metadata = load_json(os.path.join(folder, "metadata.json"))
-    journey = metadata.get("journey", folder)
-    kiwi_carriers = []
-    edreams_carriers = []
-    for entry in kiwi_data:
-        res = extract_segments_and_carriers(entry["id"])
-        if res:
-            kiwi_carriers.append(res[1])
-    for entry in edreams_data:
-        res = extract_segments_and_carriers(entry["id"])
-        if res:
-            edreams_carriers.append(res[1])
-    plt.figure(figsize=(10,6))
-    bins = range(min(kiwi_carriers+edreams_carriers), max(kiwi_carriers+edreams_carriers)+2)
-    plt.hist(kiwi_carriers, bins=bins, color='green', alpha=0.6, label='Kiwi')
-    plt.hist(edreams_carriers, bins=bins, color='blue', alpha=0.6, label='eDO')
-    plt.xlabel('Number of Carriers')
-    plt.ylabel('Frequency')
-    plt.title(f'Carrier Distribution - {journey}')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(os.path.join("plots", f"{folder}_carrier_distribution.png"))
-    plt.close()
-
-for folder in test_folders:
-    if os.path.isdir(folder):
-        kiwi_data = load_json(os.path.join(folder, "kiwi-simplified.json"))
-        edreams_data = load_json(os.path.join(folder, "edreams-simplified.json"))
-        save_graphs(folder, kiwi_data, edreams_data)
-        save_section_distribution(folder, kiwi_data, edreams_data)
-        save_carrier_distribution(folder, kiwi_data, edreams_data)
\ No newline at end of file
+def parse_entries(data):
+    """
+    Parse a simplified itinerary list once into (prices, sections, carriers)
+    arrays, so the graph functions below share one pass over the dicts.
+    Entries whose id does not parse are left out of the count arrays.
+    """
+    prices = np.fromiter((float(entry["price"]) for entry in data), dtype=np.float64, count=len(data))
+    pairs = [extract_segments_and_carriers(entry["id"]) for entry in data]
+    counts = np.array([pair for pair in pairs if pair[0] is not None], dtype=np.int16).reshape(-1, 2)
+    return prices, counts[:, 0], counts[:, 1]
+
+def count_by_value(kiwi_values, edreams_values):
+    """
+    Count integer values with np.bincount over the range shared by both
+    datasets. Returns (edges, kiwi_counts, edreams_counts), where each value
+    v gets the unit bin [v, v + 1). Either dataset may be empty; when both
+    are, the counts are empty.
+    """
+    values = np.concatenate((kiwi_values, edreams_values))
+    if not values.size:
+        return np.arange(1), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    low = values.min()
+    size = values.max() - low + 1
+    edges = np.arange(low, low + size + 1)
+    return edges, np.bincount(kiwi_values - low, minlength=size), np.bincount(edreams_values - low, minlength=size)
+
+def write_bar_svg(path, title, xlabel, edges, series, discrete=False):
+    """
+    Write a bar chart straight to an SVG file, without matplotlib.
+    edges holds the len(counts) + 1 bin edges shared by every series, and
+    series is a list of (label, color, counts) drawn in order at 0.6 opacity
+    so overlaps stay visible. With discrete=True each bin is labelled with
+    its integer value instead of evenly spaced edge values.
+    """
+    width, height = 1000, 600
+    left, right, top, bottom = 70, 20, 50, 60
+    plot_w, plot_h = width - left - right, height - top - bottom
+    x0, x1 = float(edges[0]), float(edges[-1])
+    y_max = max(max((int(counts.max()) for _, _, counts in series if len(counts)), default=0), 1)
+    y_step = max(1, -(-y_max // 5))
+    y1 = y_step * -(-y_max // y_step)
+
+    def sx(x):
+        return left + (x - x0) / (x1 - x0) * plot_w if x1 > x0 else left
+
+    def sy(y):
+        return top + plot_h - y / y1 * plot_h
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+    # Horizontal grid lines with the frequency ticks.
+    for y in range(0, y1 + 1, y_step):
+        parts.append(f'<line x1="{left}" y1="{sy(y):.1f}" x2="{left + plot_w}" y2="{sy(y):.1f}" stroke="#ddd"/>')
+        parts.append(f'<text x="{left - 6}" y="{sy(y) + 4:.1f}" text-anchor="end">{y}</text>')
+    for label, color, counts in series:
+        for low_edge, high_edge, count in zip(edges[:-1].tolist(), edges[1:].tolist(), counts.tolist()):
+            if count:
+                parts.append(
+                    f'<rect x="{sx(low_edge):.1f}" y="{sy(count):.1f}" width="{sx(high_edge) - sx(low_edge):.1f}" '
+                    f'height="{sy(0) - sy(count):.1f}" fill="{color}" fill-opacity="0.6"/>'
+                )
+    if discrete:
+        x_ticks = [((low_edge + high_edge) / 2, f"{low_edge:.0f}") for low_edge, high_edge in zip(edges[:-1].tolist(), edges[1:].tolist())]
+    else:
+        x_ticks = [(x, f"{x:.0f}") for x in np.linspace(x0, x1, 6).tolist()]
+    for x, text in x_ticks:
+        parts.append(f'<text x="{sx(x):.1f}" y="{top + plot_h + 18}" text-anchor="middle">{text}</text>')
+    parts.append(f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" fill="none" stroke="black"/>')
+    parts.append(f'<text x="{width / 2}" y="{top - 20}" text-anchor="middle" font-size="16">{escape(title)}</text>')
+    parts.append(f'<text x="{left + plot_w / 2}" y="{height - 15}" text-anchor="middle">{escape(xlabel)}</text>')
+    parts.append(f'<text transform="translate(18 {top + plot_h / 2}) rotate(-90)" text-anchor="middle">Frequency</text>')
+    # Legend in the top-right corner of the plot area.
+    for i, (label, color, _) in enumerate(series):
+        y = top + 10 + i * 20
+        parts.append(f'<rect x="{left + plot_w - 130}" y="{y}" width="14" height="14" fill="{color}" fill-opacity="0.6"/>')
+        parts.append(f'<text x="{left + plot_w - 110}" y="{y + 12}">{escape(label)}</text>')
+    parts.append('</svg>')
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(parts))
+
+def save_graphs(folder, journey, kiwi_prices, edreams_prices):
+    # Bin both datasets once with shared edges.
+    edges = np.histogram_bin_edges(np.concatenate((edreams_prices, kiwi_prices)), bins=30)
+    edreams_counts, _ = np.histogram(edreams_prices, bins=edges)
+    kiwi_counts, _ = np.histogram(kiwi_prices, bins=edges)
+    write_bar_svg(os.path.join("plots", f"{folder}_price_distribution.svg"), f'Price Distribution - {journey}', 'Price',
+                  edges, [('eDO (price)', 'blue', edreams_counts), ('Kiwi', 'green', kiwi_counts)])
+
+def save_count_distribution(folder, journey, kind, kiwi_values, edreams_values):
+    """
+    Save the distribution of one id count ("section" or "carrier") as
+    plots/{folder}_{kind}_distribution.svg.
+    """
+    edges, kiwi_counts, edreams_counts = count_by_value(kiwi_values, edreams_values)
+    write_bar_svg(os.path.join("plots", f"{folder}_{kind}_distribution.svg"), f'{kind.capitalize()} Distribution - {journey}', f'Number of {kind.capitalize()}s',
+                  edges, [('Kiwi', 'green', kiwi_counts), ('eDO', 'blue', edreams_counts)], discrete=True)
+
+def save_folder_graphs(folder):
+    """Render all graphs for one test folder; runs in a worker process."""
+    kiwi_prices, kiwi_sections, kiwi_carriers = parse_entries(load_json(os.path.join(folder, "kiwi-simplified.json")))
+    edreams_prices, edreams_sections, edreams_carriers = parse_entries(load_json(os.path.join(folder, "edreams-simplified.json")))
+    # Read the journey name once for all of the folder's graphs.
+    journey = load_json(os.path.join(folder, "metadata.json")).get("journey", folder)
+    save_graphs(folder, journey, kiwi_prices, edreams_prices)
+    save_count_distribution(folder, journey, "section", kiwi_sections, edreams_sections)
+    save_count_distribution(folder, journey, "carrier", kiwi_carriers, edreams_carriers)
+
+# -----------------------------
+# Main: Process Test Folders, Build Tables and Export Graphs
+# -----------------------------
+test_folders = ["test1", "test2", "test3", "test4"]
+
+if __name__ == "__main__":
+    # Define mapper file paths.
+    input_file = "edreams-response.json"
+    output_file = "edreams-simplified.json"
+    simplify_edreams_json(input_file, output_file)
+
+    all_results = []
+    hub_breakdown_all = []
+    cheap_analysis_table = []  # New table for deep cheap analysis
+    hubs_distribution_table = []  # New table for hubs distribution
+    # Folders are independent, so analyze them in worker processes and
+    # collect the results back in test_folders order.
+    with ProcessPoolExecutor(max_workers=len(test_folders)) as executor:
+        futures = {executor.submit(analyze_journey, folder): folder
+                   for folder in test_folders if os.path.isdir(folder)}
+        results_by_folder = {futures[future]: future.result() for future in as_completed(futures)}
+    for folder in test_folders:
+        if folder in results_by_folder:
+            result = results_by_folder[folder]
+            all_results.append(result)
+            for hub_info in result.get("Hub Breakdown", []):
+                hub_breakdown_all.append([result["Journey"], hub_info["Hub"], hub_info["Usage"], hub_info["Cheaper Usage"]])
+            ca = result.get("Cheap Analysis", {})
+            cheap_analysis_table.append([
+                result["Journey"],
+                ca.get("Total Cheap Kiwi", ""),
+                ca.get("Cheap Missing Count", ""),
+                ca.get("Cheap Missing Due to Hub", ""),
+                ca.get("Cheap Missing Not Due to Hub", ""),
+                ca.get("Cheap Missing NonHub with FR Flights", ""),
+                ca.get("Cheaper Kiwi with FR Flights", "")
+            ])
+            hubs_distribution_table.append([
+                result["Journey"],
+                result.get("Hubs Distribution (All Kiwi)", ""),
+                result.get("Hubs Distribution (Cheap Kiwi)", "")
+            ])
+        else:
+            print(f"Folder {folder} not found.")
+
+    # Define table headers.
+    content_headers = [
+        "Journey", "Departure", "Arrival",
+        "Total Kiwi", "Total eDreams",
+        "Repeated", "Repeated %", "Missing Content in eDO",
+        "Missing Flights", "Constructible", "Constructible among Cheap Kiwi",
+        "Missing Carriers", "Missing Carriers Count",
+        "Cheaper Kiwi with FR Flights"
+    ]
+
+    global_pricing_headers = [
+        "Journey",
+        "Kiwi itineraries cheaper the eDO cheapest",
+        "Cheapest eDreams", "Cheapest Kiwi",
+        "Overall % of itineraries were Kiwi was cheaper"
+    ]
+
+    repeated_pricing_headers = [
+        "Journey",
+        "Kiwi cheaper", "eDreams cheaper",
+        "Overall Avg Price Diff",
+        "Avg Diff when eDreams Cheaper", "Avg Diff when Kiwi Cheaper"
+    ]
+
+    hub_data_headers = [
+        "Journey",
+        "Missing Hub Cities in eDO",
+        "Missing Hub Cities Count",
+        "Missing Cheaper Hubs Count",
+        "Missing Hub Itinerary Count",
+        "Missing Hub Cheaper Itinerary Count"
+    ]
+
+    hub_breakdown_headers = ["Journey", "Hub", "Usage", "Cheaper Usage"]
+
+    cheap_analysis_headers = [
+        "Journey",
+        "Total Cheap Kiwi",
+        "Cheap Missing Count",
+        "Cheap Missing Due to Hub",
+        "Cheap Missing Not Due to Hub",
+        "Cheap Missing NonHub with FR Flights",
+        "Cheaper Kiwi with FR Flights"
+    ]
+
+    hubs_distribution_headers = [
+        "Journey",
+        "Hubs Distribution (All Kiwi)",
+        "Hubs Distribution (Cheap Kiwi)"
+    ]
+
+    # Build the tables.
+    content_table = [[res[h] for h in content_headers] for res in all_results]
+    global_pricing_table = [[res[h] for h in global_pricing_headers] for res in all_results]
+    repeated_pricing_table = [[res[h] for h in repeated_pricing_headers] for res in all_results]
+    hub_data_table = [[res["Journey"],
+                       res["Missing Hub Cities in eDO"],
+                       res["Missing Hub Cities Count"],
+                       res["Missing Cheaper Hubs Count"],
+                       res["Missing Hub Itinerary Count"],
+                       res["Missing Hub Cheaper Itinerary Count"]]
+                      for res in all_results]
+    hub_breakdown_table = []
+    for res in all_results:
+        journey = res["Journey"]
+        for hub_info in res.get("Hub Breakdown", []):
+            hub_breakdown_table.append([journey, hub_info["Hub"], hub_info["Usage"], hub_info["Cheaper Usage"]])
+    cheap_analysis_table_final = cheap_analysis_table
+    hubs_distribution_table_final = hubs_distribution_table
+
+    print("\nContent Related Data:")
+    print(tabulate(content_table, headers=content_headers, tablefmt="grid"))
+    print("\nGlobal Pricing Data:")
+    print(tabulate(global_pricing_table, headers=global_pricing_headers, tablefmt="grid"))
+    print("\nRepeated Pricing Data:")
+    print(tabulate(repeated_pricing_table, headers=repeated_pricing_headers, tablefmt="grid"))
+    print("\nHigh-Level Hub Data:")
+    print(tabulate(hub_data_table, headers=hub_data_headers, tablefmt="grid"))
+    print("\nHub Breakdown Data:")
+    print_table(hub_breakdown_headers, hub_breakdown_table)
+    print("\nCheap Analysis Data:")
+    print(tabulate(cheap_analysis_table_final, headers=cheap_analysis_headers, tablefmt="grid"))
+    print("\nHubs Distribution Data:")
+    print(tabulate(hubs_distribution_table_final, headers=hubs_distribution_headers, tablefmt="grid"))
+
+    csv_exports = [
+        ("outputs/content_data.csv", content_headers, content_table),
+        ("outputs/global_pricing_data.csv", global_pricing_headers, global_pricing_table),
+        ("outputs/repeated_pricing_data.csv", repeated_pricing_headers, repeated_pricing_table),
+        ("outputs/hub_data.csv", hub_data_headers, hub_data_table),
+        ("outputs/hub_breakdown_data.csv", hub_breakdown_headers, hub_breakdown_table),
+        ("outputs/cheap_analysis_data.csv", cheap_analysis_headers, cheap_analysis_table_final),
+        ("outputs/hubs_distribution_data.csv", hubs_distribution_headers, hubs_distribution_table_final),
+    ]
+    # The files are independent, so write them from threads to overlap the I/O.
+    with ThreadPoolExecutor(max_workers=len(csv_exports)) as executor:
+        list(executor.map(lambda args: export_to_csv(*args), csv_exports))
+
+    print("\nCSV files 'content_data.csv', 'global_pricing_data.csv', 'repeated_pricing_data.csv', 'hub_data.csv', 'hub_breakdown_data.csv', 'cheap_analysis_data.csv', and 'hubs_distribution_data.csv' have been saved.")
+
+    os.makedirs("plots", exist_ok=True)
+
+    # Each folder's graphs are independent, so render them in worker processes
+    # too; workers load their own JSON rather than receiving pickled data.
+    graph_folders = [folder for folder in test_folders if os.path.isdir(folder)]
+    with ProcessPoolExecutor(max_workers=min(len(test_folders), os.cpu_count() or 1)) as executor:
+        list(executor.map(save_folder_graphs, graph_folders))
\ No newline at end of file
@@ -1,6 +1,7 @@
-import json
+import orjson  # install via: pip install orjson
 import matplotlib.pyplot as plt
-import re
+import os
+import hashlib
 import numpy as np
 
 # Helper function to extract segments and carriers from the composed id.
@@ -9,31 +10,65 @@ def extract_segments_and_carriers(itinerary_id):
     Assumes itinerary_id is a string starting with "s{num}-c{num}".
     For example, "s3-c1-KL-3390-KL-6149-KL-6126" indicates 3 segments and 1 carrier.
     """
-    # Use regex to extract the number after 's' and 'c'
-    match = re.match(r's(\d+)-c(\d+)', itinerary_id)
-    if match:
-        segments = int(match.group(1))
-        carriers = int(match.group(2))
-        return segments, carriers
-    else:
+    # The prefix is fixed, so slice around the first two dashes instead of
+    # running the regex engine on every id.
+    sep1 = itinerary_id.find('-')
+    if sep1 < 2 or itinerary_id[0] != 's' or itinerary_id[sep1 + 1:sep1 + 2] != 'c':
         return None, None
+    sep2 = itinerary_id.find('-', sep1 + 2)
+    if sep2 == -1:
+        sep2 = len(itinerary_id)
+    segments, carriers = itinerary_id[1:sep1], itinerary_id[sep1 + 2:sep2]
+    if not (segments.isdigit() and carriers.isdigit()):
+        return None, None
+    return int(segments), int(carriers)
+
+# Parse the segment and carrier counts of every id in one pass.
+def segments_and_carriers(itinerary_ids):
+    """
+    Returns two int arrays (segments, carriers), skipping ids that do not
+    start with "s{num}-c{num}".
+    """
+    pairs = [extract_segments_and_carriers(itinerary_id) for itinerary_id in itinerary_ids]
+    counts = np.array([pair for pair in pairs if pair[0] is not None], dtype=np.int32).reshape(-1, 2)
+    return counts[:, 0], counts[:, 1]
 
 # Load JSON files
 def load_json(file_path):
-    with open(file_path, "r") as file:
-        return json.load(file)
+    with open(file_path, "rb") as file:
+        return orjson.loads(file.read())
+
+# Load Kiwi ids and prices, preferring the side file mapper-kiwi.py writes.
+def load_ids_and_prices(file_path):
+    """
+    Returns (ids, prices) for a simplified file. Uses the ".index.npz" side
+    file when the JSON digest stored in it matches the JSON's current bytes,
+    and falls back to parsing the JSON otherwise.
+    """
+    with open(file_path, "rb") as file:
+        raw = file.read()
+    index_path = os.path.splitext(file_path)[0] + ".index.npz"
+    if os.path.exists(index_path):
+        with np.load(index_path) as index:
+            if str(index["source"]) == hashlib.blake2b(raw, digest_size=16).hexdigest():
+                return index["ids"].tolist(), index["prices"]
+    data = orjson.loads(raw)
+    ids = [entry["id"] for entry in data]
+    prices = np.fromiter((float(entry["price"]) for entry in data), dtype=np.float64, count=len(data))
+    return ids, prices
 
 # File paths
 kiwi_file_path = "kiwi-simplified.json"
 edreams_file_path = "edreams-simplified.json"
 
 # Load data
-kiwi_data = load_json(kiwi_file_path)
+kiwi_ids, kiwi_prices = load_ids_and_prices(kiwi_file_path)
 edreams_data = load_json(edreams_file_path)
+edreams_ids = [entry["id"] for entry in edreams_data]
 
 # Create sets for itinerary ids
-kiwi_itinerary_ids = {entry["id"] for entry in kiwi_data}
-edreams_itinerary_ids = {entry["id"] for entry in edreams_data}
+kiwi_itinerary_ids = set(kiwi_ids)
+edreams_itinerary_ids = set(edreams_ids)
 
 # Find repeated itineraries
 repeated_itineraries = kiwi_itinerary_ids.intersection(edreams_itinerary_ids)
@@ -42,12 +77,16 @@ repeated_itineraries = kiwi_itinerary_ids.intersection(edreams_itinerary_ids)
 missing_in_edreams = kiwi_itinerary_ids - edreams_itinerary_ids
 missing_in_kiwi = edreams_itinerary_ids - kiwi_itinerary_ids
 
-# Find the cheapest itineraries (price field assumed to be convertible to float)
-cheapest_edreams_price = min(float(entry["price"]) for entry in edreams_data)
-cheapest_kiwi_price = min(float(entry["price"]) for entry in kiwi_data)
+# Parse prices once (price field assumed to be convertible to float)
+edreams_prices = np.fromiter((float(entry["price"]) for entry in edreams_data), dtype=np.float64, count=len(edreams_data))
+
+# Find the cheapest itineraries
+cheapest_edreams_price = float(edreams_prices.min())
+cheapest_kiwi_price = float(kiwi_prices.min())
 
 # Get Kiwi itineraries cheaper than the cheapest eDreams itinerary (global minimum)
-cheaper_kiwi_itineraries = [entry["id"] for entry in kiwi_data if float(entry["price"]) < cheapest_edreams_price]
+cheaper_kiwi_mask = kiwi_prices < cheapest_edreams_price
+cheaper_kiwi_itineraries = [kiwi_ids[i] for i in np.flatnonzero(cheaper_kiwi_mask)]
 
 # Print basic analysis results
 print("ANALYSIS OF MAD-NYC RT")
@@ -62,32 +101,31 @@ print(f"Kiwi itineraries cheaper than cheapest eDreams: {len(cheaper_kiwi_itiner
 
 # ----------------- Repeated Itineraries Price Comparison -----------------
 # For repeated itineraries, compare prices between eDreams and Kiwi.
-eDreams_cheaper_count = 0
-kiwi_cheaper_count = 0
-price_diff_sum = 0  # Sum of (eDreams price - Kiwi price) over all repeated itineraries
-# Separate lists for differences when each OTA is cheaper:
-eDreams_cheaper_diffs = []  # When eDreams is cheaper: (kiwi_price - edreams_price)
-kiwi_cheaper_diffs = []     # When Kiwi is cheaper: (edreams_price - kiwi_price)
-
-for itinerary_id in repeated_itineraries:
-    # Find the itinerary's price in both datasets.
-    edreams_price = float(next(entry["price"] for entry in edreams_data if entry["id"] == itinerary_id))
-    kiwi_price = float(next(entry["price"] for entry in kiwi_data if entry["id"] == itinerary_id))
-    price_diff = edreams_price - kiwi_price  # Positive if eDreams is more expensive
-    price_diff_sum += price_diff
-    if edreams_price < kiwi_price:
-        eDreams_cheaper_count += 1
-        eDreams_cheaper_diffs.append(kiwi_price - edreams_price)
-    elif kiwi_price < edreams_price:
-        kiwi_cheaper_count += 1
-        kiwi_cheaper_diffs.append(edreams_price - kiwi_price)
-
-total_repeated = len(repeated_itineraries)
+# Index prices by id once; the first entry wins when an id is duplicated.
+edreams_price_by_id = {}
+for itinerary_id, price in zip(edreams_ids, edreams_prices.tolist()):
+    edreams_price_by_id.setdefault(itinerary_id, price)
+kiwi_price_by_id = {}
+for itinerary_id, price in zip(kiwi_ids, kiwi_prices.tolist()):
+    kiwi_price_by_id.setdefault(itinerary_id, price)
+
+# Aligned price arrays over the repeated itineraries.
+repeated_ids = sorted(repeated_itineraries)
+total_repeated = len(repeated_ids)
+repeated_edreams_prices = np.fromiter((edreams_price_by_id[i] for i in repeated_ids), dtype=np.float64, count=total_repeated)
+repeated_kiwi_prices = np.fromiter((kiwi_price_by_id[i] for i in repeated_ids), dtype=np.float64, count=total_repeated)
+price_diffs = repeated_edreams_prices - repeated_kiwi_prices  # Positive if eDreams is more expensive
+# Differences when each OTA is cheaper, both as positive amounts:
+eDreams_cheaper_diffs = -price_diffs[price_diffs < 0]  # (kiwi_price - edreams_price)
+kiwi_cheaper_diffs = price_diffs[price_diffs > 0]      # (edreams_price - kiwi_price)
+eDreams_cheaper_count = len(eDreams_cheaper_diffs)
+kiwi_cheaper_count = len(kiwi_cheaper_diffs)
+
 percent_eDreams_cheaper_repeated = 100 * eDreams_cheaper_count / total_repeated if total_repeated else 0
 percent_kiwi_cheaper_repeated = 100 * kiwi_cheaper_count / total_repeated if total_repeated else 0
-overall_avg_price_diff = price_diff_sum / total_repeated if total_repeated else 0
-avg_diff_eDreams_cheaper = sum(eDreams_cheaper_diffs) / len(eDreams_cheaper_diffs) if eDreams_cheaper_diffs else 0
-avg_diff_kiwi_cheaper = sum(kiwi_cheaper_diffs) / len(kiwi_cheaper_diffs) if kiwi_cheaper_diffs else 0
+overall_avg_price_diff = price_diffs.mean() if total_repeated else 0
+avg_diff_eDreams_cheaper = eDreams_cheaper_diffs.mean() if eDreams_cheaper_count else 0
+avg_diff_kiwi_cheaper = kiwi_cheaper_diffs.mean() if kiwi_cheaper_count else 0
 
 print("\nAmong repeated itineraries:")
 print(f"  Percentage of times eDreams was cheaper: {percent_eDreams_cheaper_repeated:.2f}%")
@@ -102,21 +140,23 @@ print(f"  Average price difference when Kiwi is cheaper (eDreams price - Kiwi pr
 # 1. Kiwi itineraries (not repeated) that are cheaper than the global cheapest eDreams price.
 # 2. Among repeated itineraries, those where Kiwi was cheaper.
 not_repeated_kiwi = kiwi_itinerary_ids - repeated_itineraries
-count_non_repeated_kiwi = sum(1 for entry in kiwi_data if entry["id"] in not_repeated_kiwi and float(entry["price"]) < cheapest_edreams_price)
+# cheaper_kiwi_itineraries already holds every Kiwi row below the cheapest eDreams price.
+count_non_repeated_kiwi = sum(1 for itinerary_id in cheaper_kiwi_itineraries if itinerary_id in not_repeated_kiwi)
 numerator = count_non_repeated_kiwi + kiwi_cheaper_count
-total_itineraries = len(kiwi_data) + len(edreams_data)
+total_itineraries = len(kiwi_ids) + len(edreams_data)
 percent_kiwi_cheaper_overall = 100 * numerator / total_itineraries
 
 print(f"\nPercentage of Kiwi itineraries cheaper than eDreams (overall): {percent_kiwi_cheaper_overall:.2f}%")
 
 # ----------------- Price Distribution Graph -----------------
-edreams_prices = [float(entry["price"]) for entry in edreams_data]
-kiwi_prices = [float(entry["price"]) for entry in kiwi_data]
-
-plt.figure(figsize=(10, 6))
+# Bin both datasets once with shared edges, then draw plain bars.
 bins = 30  # Adjust as needed
-plt.hist(edreams_prices, bins=bins, color='blue', alpha=0.6, label='eDreams')
-plt.hist(kiwi_prices, bins=bins, color='green', alpha=0.6, label='Kiwi')
+edges = np.histogram_bin_edges(np.concatenate((edreams_prices, kiwi_prices)), bins=bins)
+edreams_price_counts, _ = np.histogram(edreams_prices, bins=edges)
+kiwi_price_counts, _ = np.histogram(kiwi_prices, bins=edges)
+plt.figure(figsize=(10, 6))
+plt.bar(edges[:-1], edreams_price_counts, width=np.diff(edges), align='edge', color='blue', alpha=0.6, label='eDreams')
+plt.bar(edges[:-1], kiwi_price_counts, width=np.diff(edges), align='edge', color='green', alpha=0.6, label='Kiwi')
 plt.xlabel('Price')
 plt.ylabel('Frequency')
 plt.title('Price Distribution: eDreams (blue) vs Kiwi (green)')
@@ -127,76 +167,52 @@ plt.savefig("price_distribution.png")
 plt.show()
 
 # ----------------- Segments Distribution Graph -----------------
-edreams_segments = []
-for entry in edreams_data:
-    segments, _ = extract_segments_and_carriers(entry["id"])
-    if segments is not None:
-        edreams_segments.append(segments)
-
-kiwi_segments = []
-for entry in kiwi_data:
-    segments, _ = extract_segments_and_carriers(entry["id"])
-    if segments is not None:
-        kiwi_segments.append(segments)
+edreams_segments, edreams_carriers = segments_and_carriers(edreams_ids)
+kiwi_segments, kiwi_carriers = segments_and_carriers(kiwi_ids)
 
+all_segments = np.concatenate((edreams_segments, kiwi_segments))
+# Integer counts, so one bincount per dataset replaces the histogram.
+positions = np.arange(all_segments.min(), all_segments.max() + 1)
 plt.figure(figsize=(10, 6))
-bins = range(min(edreams_segments + kiwi_segments), max(edreams_segments + kiwi_segments) + 2)
-plt.hist(edreams_segments, bins=bins, color='blue', alpha=0.6, label='eDreams', align='left')
-plt.hist(kiwi_segments, bins=bins, color='green', alpha=0.6, label='Kiwi', align='left')
+plt.bar(positions, np.bincount(edreams_segments - positions[0], minlength=len(positions)), width=1.0, color='blue', alpha=0.6, label='eDreams')
+plt.bar(positions, np.bincount(kiwi_segments - positions[0], minlength=len(positions)), width=1.0, color='green', alpha=0.6, label='Kiwi')
 plt.xlabel('Number of Segments')
 plt.ylabel('Frequency')
 plt.title('Segments Distribution per Itinerary: eDreams (blue) vs Kiwi (green)')
 plt.legend()
 plt.grid(True)
 plt.tight_layout()
-plt.xticks(np.arange(min(edreams_segments + kiwi_segments),
-                      max(edreams_segments + kiwi_segments) + 2, 1))
+plt.xticks(np.arange(all_segments.min(), all_segments.max() + 2, 1))
 plt.savefig("segments_distribution.png")
 plt.show()
 
 # ----------------- Carriers Distribution Graph -----------------
-edreams_carriers = []
-for entry in edreams_data:
-    _, carriers = extract_segments_and_carriers(entry["id"])
-    if carriers is not None:
-        edreams_carriers.append(carriers)
-
-kiwi_carriers = []
-for entry in kiwi_data:
-    _, carriers = extract_segments_and_carriers(entry["id"])
-    if carriers is not None:
-        kiwi_carriers.append(carriers)
-
+all_carriers = np.concatenate((edreams_carriers, kiwi_carriers))
+positions = np.arange(all_carriers.min(), all_carriers.max() + 1)
 plt.figure(figsize=(10, 6))
-bins = range(min(edreams_carriers + kiwi_carriers), max(edreams_carriers + kiwi_carriers) + 2)
-plt.hist(edreams_carriers, bins=bins, color='blue', alpha=0.6, label='eDreams', align='left')
-plt.hist(kiwi_carriers, bins=bins, color='green', alpha=0.6, label='Kiwi', align='left')
+plt.bar(positions, np.bincount(edreams_carriers - positions[0], minlength=len(positions)), width=1.0, color='blue', alpha=0.6, label='eDreams')
+plt.bar(positions, np.bincount(kiwi_carriers - positions[0], minlength=len(positions)), width=1.0, color='green', alpha=0.6, label='Kiwi')
 plt.xlabel('Number of Carriers per Itinerary')
 plt.ylabel('Frequency')
 plt.title('Carriers Distribution per Itinerary: eDreams (blue) vs Kiwi (green)')
 plt.legend()
 plt.grid(True)
 plt.tight_layout()
-plt.xticks(np.arange(min(edreams_carriers + kiwi_carriers),
-                      max(edreams_carriers + kiwi_carriers) + 2, 1))
+plt.xticks(np.arange(all_carriers.min(), all_carriers.max() + 2, 1))
 plt.savefig("carriers_distribution.png")
 plt.show()
 
 # ----------------- Optional: Save Sets to Files -----------------
-with open("kiwi_itineraries.json", "w") as file:
-    json.dump(list(kiwi_itinerary_ids), file, indent=4)
-
-with open("edreams_itineraries.json", "w") as file:
-    json.dump(list(edreams_itinerary_ids), file, indent=4)
-
-with open("repeated_itineraries.json", "w") as file:
-    json.dump(list(repeated_itineraries), file, indent=4)
-
-with open("missing_in_edreams.json", "w") as file:
-    json.dump(list(missing_in_edreams), file, indent=4)
-
-with open("missing_in_kiwi.json", "w") as file:
-    json.dump(list(missing_in_kiwi), file, indent=4)
-
-with open("cheaper_kiwi_itineraries.json", "w") as file:
-    json.dump(list(cheaper_kiwi_itineraries), file, indent=4)
\ No newline at end of file
+# Sets are sorted straight into lists, which also makes the files stable
+# between runs; cheaper_kiwi_itineraries is already a list.
+saved_sets = {
+    "kiwi_itineraries.json": sorted(kiwi_itinerary_ids),
+    "edreams_itineraries.json": sorted(edreams_itinerary_ids),
+    "repeated_itineraries.json": repeated_ids,
+    "missing_in_edreams.json": sorted(missing_in_edreams),
+    "missing_in_kiwi.json": sorted(missing_in_kiwi),
+    "cheaper_kiwi_itineraries.json": cheaper_kiwi_itineraries,
+}
+for file_name, payload in saved_sets.items():
+    with open(file_name, "wb") as file:
+        file.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
\ No newline at end of file
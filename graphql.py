@@ -1,4 +1,5 @@
-import requests
+import asyncio
+import httpx  # install via: pip install "httpx[http2]"
 
 # API endpoint
 url = "https://api.skypicker.com/umbrella/v2/graphql?featureName=SearchReturnItinerariesQuery"
@@ -119,19 +120,30 @@ headers = {
     "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 }
 
-# Payload
-payload = {
-    "query": query,
-    "variables": variables
-}
+# One variables dict per query to send (e.g. one per route)
+variable_sets = [variables]
+
+async def fetch_all(variable_sets):
+    # A single client keeps one HTTP/2 connection alive, so every query shares
+    # the TLS handshake and all of them are in flight at once.
+    # Searches can take a while to answer, so override httpx's 5 s default;
+    # return_exceptions keeps one failed route from discarding the others.
+    async with httpx.AsyncClient(http2=True, headers=headers, timeout=30) as client:
+        return await asyncio.gather(*(
+            client.post(url, json={"query": query, "variables": query_variables})
+            for query_variables in variable_sets
+        ), return_exceptions=True)
 
-# Send the POST request
-response = requests.post(url, json=payload, headers=headers)
+# Send the POST requests
+responses = asyncio.run(fetch_all(variable_sets))
 
-# Process the response
-if response.status_code == 200:
-    print("Response data:")
-    print(response.json())
-else:
-    print(f"Request failed with status code {response.status_code}")
-    print(response.text)
\ No newline at end of file
+# Process the responses
+for response in responses:
+    if isinstance(response, Exception):
+        print(f"Request failed: {response!r}")
+    elif response.status_code == 200:
+        print("Response data:")
+        print(response.json())
+    else:
+        print(f"Request failed with status code {response.status_code}")
+        print(response.text)
\ No newline at end of file
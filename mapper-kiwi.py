@@ -1,4 +1,6 @@
-import json
+import ijson  # install via: pip install ijson
+import orjson  # install via: pip install orjson
+import numpy as np
 import os
 import hashlib
 
@@ -7,85 +9,83 @@ def generate_itinerary_id(itinerary):
     Generate a unique itinerary ID based on:
     "#segments-#diffcarriers-sourceStationId-segmentXdepartureLocalTime-segmentXdestinationStationId-segmentXcarrierCode-segmentXflightcodearrivalLocalTime"
     """
-    segments = []
-    carriers = set()
+    sectors = itinerary.get("outbound", {}).get("sectorSegments", []) + itinerary.get("inbound", {}).get("sectorSegments", [])
 
-    for sector in itinerary.get("outbound", {}).get("sectorSegments", []) + itinerary.get("inbound", {}).get("sectorSegments", []):
-        segment = sector.get("segment", {})
-        source = segment.get("source", {}).get("station", {}).get("code", "")
-        destination = segment.get("destination", {}).get("station", {}).get("code", "")
-        carrier_code = segment.get("carrier", {}).get("code", "")
-        flight_code = segment.get("code", "")
-
-        #segments.append(f"{source}-{destination}-{carrier_code}-{flight_code}")
-        segments.append(f"{carrier_code}-{flight_code}")
-        carriers.add(carrier_code)
+    # Only carrier and flight code go into the id; source/destination are not looked up.
+    pairs = [(segment.get("carrier", {}).get("code", ""), segment.get("code", ""))
+             for sector in sectors for segment in (sector.get("segment", {}),)]
 
-    segment_count = len(segments)
-    carrier_count = len(carriers)
-    raw_id = f"s{segment_count}-c{carrier_count}-" + "-".join(segments)
+    segment_count = len(pairs)
+    carrier_count = len({carrier_code for carrier_code, _ in pairs})
+    return f"s{segment_count}-c{carrier_count}-" + "-".join(f"{carrier_code}-{flight_code}" for carrier_code, flight_code in pairs)
 
-    # Generate a hash to keep ID length manageable
-    itinerary_id = raw_id#hashlib.md5(raw_id.encode()).hexdigest()[:16]
-
-    return itinerary_id
+def simplify_segments(sectors):
+    """
+    Map Kiwi sectorSegments to simplified segments. Each segment's source and
+    destination dicts are looked up once and reused for station and time.
+    """
+    simplified = []
+    for sector in sectors:
+        segment = sector.get("segment", {})
+        source = segment.get("source", {})
+        destination = segment.get("destination", {})
+        simplified.append({
+            "sourceStationId": source.get("station", {}).get("code"),
+            "destinationStationId": destination.get("station", {}).get("code"),
+            "departureLocalTime": source.get("localTime"),
+            "arrivalLocalTime": destination.get("localTime"),
+            "flightCode": segment.get("code"),
+            "carrierCode": segment.get("carrier", {}).get("code")
+        })
+    return simplified
+
+def json_digest(payload):
+    """Digest of a simplified JSON file's bytes, used to validate its side file."""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
 def simplify_kiwi_json(input_filepath, output_filepath):
-    # Load original Kiwi JSON
-    with open(input_filepath, "r", encoding="utf-8") as file:
-        kiwi_data = json.load(file)
-
-    # Extract itineraries
-    itineraries = kiwi_data.get("data", {}).get("returnItineraries", {}).get("itineraries", [])
-
     simplified_itineraries = []
-
-    for itinerary in itineraries:
-        itinerary_id = generate_itinerary_id(itinerary)
-
-        simplified_itinerary = {
-            "id": itinerary_id,
-            "price": itinerary.get("priceEur", {}).get("amount"),
-            "currency": "EUR",
-            "outbound": [],
-            "inbound": []
-        }
-
-        # Process outbound segments
-        for sector in itinerary.get("outbound", {}).get("sectorSegments", []):
-            segment = sector.get("segment", {})
-            simplified_itinerary["outbound"].append({
-                "sourceStationId": segment.get("source", {}).get("station", {}).get("code"),
-                "destinationStationId": segment.get("destination", {}).get("station", {}).get("code"),
-                "departureLocalTime": segment.get("source", {}).get("localTime"),
-                "arrivalLocalTime": segment.get("destination", {}).get("localTime"),
-                "flightCode": segment.get("code"),
-                "carrierCode": segment.get("carrier", {}).get("code")
-            })
-
-        # Process inbound segments
-        for sector in itinerary.get("inbound", {}).get("sectorSegments", []):
-            segment = sector.get("segment", {})
-            simplified_itinerary["inbound"].append({
-                "sourceStationId": segment.get("source", {}).get("station", {}).get("code"),
-                "destinationStationId": segment.get("destination", {}).get("station", {}).get("code"),
-                "departureLocalTime": segment.get("source", {}).get("localTime"),
-                "arrivalLocalTime": segment.get("destination", {}).get("localTime"),
-                "flightCode": segment.get("code"),
-                "carrierCode": segment.get("carrier", {}).get("code")
-            })
-
-        simplified_itineraries.append(simplified_itinerary)
+    ids = []
+    prices = []
+
+    # Stream the itineraries out of the original Kiwi JSON, so only one raw
+    # itinerary is held in memory at a time instead of the whole response.
+    with open(input_filepath, "rb") as file:
+        itineraries = ijson.items(file, "data.returnItineraries.itineraries.item", use_float=True)
+        for itinerary in itineraries:
+            itinerary_id = generate_itinerary_id(itinerary)
+
+            simplified_itinerary = {
+                "id": itinerary_id,
+                "price": itinerary.get("priceEur", {}).get("amount"),
+                "currency": "EUR",
+                "outbound": simplify_segments(itinerary.get("outbound", {}).get("sectorSegments", [])),
+                "inbound": simplify_segments(itinerary.get("inbound", {}).get("sectorSegments", []))
+            }
+
+            simplified_itineraries.append(simplified_itinerary)
+            ids.append(itinerary_id)
+            prices.append(simplified_itinerary["price"])
 
     # Save simplified JSON
-    with open(output_filepath, "w", encoding="utf-8") as file:
-        json.dump(simplified_itineraries, file, indent=4, ensure_ascii=False)
+    payload = orjson.dumps(simplified_itineraries, option=orjson.OPT_INDENT_2)
+    with open(output_filepath, "wb") as file:
+        file.write(payload)
+
+    # Also save ids and prices in one side file, so the analysis can load them
+    # without re-parsing the JSON and converting every price string again.
+    # The digest of the JSON it was built from is stored with them, so an
+    # edited or replaced JSON is never served stale ids and prices.
+    index_path = os.path.splitext(output_filepath)[0] + ".index.npz"
+    np.savez(index_path, source=np.array(json_digest(payload)),
+             ids=np.array(ids, dtype=str), prices=np.array(prices, dtype=np.float64))
 
     print(f"Simplified JSON saved to {output_filepath}")
 
-# Define paths
-input_file = "kiwi-response.json"
-output_file = "kiwi-simplified.json"
+if __name__ == "__main__":
+    # Define paths
+    input_file = "kiwi-response.json"
+    output_file = "kiwi-simplified.json"
 
-# Run script
-simplify_kiwi_json(input_file, output_file)
\ No newline at end of file
+    # Run script
+    simplify_kiwi_json(input_file, output_file)
\ No newline at end of file
@@ -2,46 +2,64 @@ import asyncio
 from playwright.async_api import async_playwright
 
 
-async def fetch_flight_data(origin, destination, departure_date,
-    return_date=None):
+async def fetch_flight_data(browser, origin, destination, departure_date,
+    return_date=None, timeout=30):
   url = f"https://www.kiwi.com/en/search/results/{origin}/{destination}/{departure_date}"
 
   if return_date:
     url += f"/{return_date}"
 
-  async with async_playwright() as p:
-    # Launch Chrome
-    browser = await p.chromium.launch(
-      headless=False)  # Set to False to see the browser
-    context = await browser.new_context()
-    page = await context.new_page()
+  # Own context per route so concurrent searches don't share cookies/state
+  context = await browser.new_context()
+  page = await context.new_page()
+  flight_data = asyncio.get_running_loop().create_future()
 
-    print(f"Navigating to: {url}")
-    await page.goto(url)
+  # Listen to network responses; resolve as soon as the itineraries query answers
+  async def handle_request(response):
+    if "graphql?featureName=SearchReturnItinerariesQuery" in response.url and not flight_data.done():
+      try:
+        json_data = await response.json()
+      except Exception:
+        print("Error parsing JSON")
+        return
+      if not flight_data.done():
+        flight_data.set_result(json_data)
 
-    # Listen to network requests
-    async def handle_request(response):
-      if "graphql?featureName=SearchReturnItinerariesQuery" in response.url:
-        try:
-          json_data = await response.json()
-          print("\n--- Flight Data JSON ---\n")
-          print(json_data)
-        except:
-          print("Error parsing JSON")
+  # Register before navigating so an early response is not missed
+  page.on("response", handle_request)
 
-    page.on("response", handle_request)
+  print(f"Navigating to: {url}")
+  await page.goto(url)
 
-    # Wait for some time to capture responses
-    await page.wait_for_timeout(10000)  # 10 seconds
-
-    # Close browser
-    await browser.close()
+  try:
+    # Wait for the flight data instead of a fixed sleep
+    json_data = await asyncio.wait_for(flight_data, timeout)
+    print("\n--- Flight Data JSON ---\n")
+    print(json_data)
+    return json_data
+  except asyncio.TimeoutError:
+    print(f"No flight data received for: {url}")
+    return None
+  finally:
+    await context.close()
 
 
 # Test the script with different routes
+routes = [
+  ("madrid-spain", "palma-de-mallorca-palma-spain", "2025-06-14"),
+]
+
+
 async def main():
-  await fetch_flight_data("madrid-spain", "palma-de-mallorca-palma-spain",
-                          "2025-06-14")
+  async with async_playwright() as p:
+    # Launch Chrome once and share it across all routes
+    browser = await p.chromium.launch(
+      headless=False)  # Set to False to see the browser
+    try:
+      await asyncio.gather(*(fetch_flight_data(browser, *route) for route in routes))
+    finally:
+      # Close browser
+      await browser.close()
 
 
 
@@ -1,4 +1,4 @@
-import json
+import orjson  # install via: pip install orjson
 import os
 import hashlib
 
@@ -24,8 +24,8 @@ def generate_edreams_itinerary_id(itinerary, segments):
 
 def simplify_edreams_json(input_filepath, output_filepath):
     # Load original eDreams JSON
-    with open(input_filepath, "r", encoding="utf-8") as file:
-        edreams_data = json.load(file)
+    with open(input_filepath, "rb") as file:
+        edreams_data = orjson.loads(file.read())
 
     # Extract itineraries
     itineraries = edreams_data.get("itinerarySearchResults", {}).get("itineraryResults", [])
@@ -46,19 +46,19 @@ def simplify_edreams_json(input_filepath, output_filepath):
 
         # Process segments
         for segment_key in all_segment_keys:
+            # Find segment in segment map (same for every part of the key)
+            segment = segments_map.get(segment_key, {})
+            source_station = segment.get("departureStationCode", "")
+            destination_station = segment.get("arrivalStationCode", "")
+            departure_time = segment.get("departureDateTime", "")
+            arrival_time = segment.get("arrivalDateTime", "")
+
             for segment_part in segment_key.split(","):
                 if segment_part == '0':
                     continue
                 flight_code = segment_part[2:]
                 carrier_code = segment_part[:2]
 
-                # Find segment in segment map
-                segment = segments_map.get(segment_key, {})
-                source_station = segment.get("departureStationCode", "")
-                destination_station = segment.get("arrivalStationCode", "")
-                departure_time = segment.get("departureDateTime", "")
-                arrival_time = segment.get("arrivalDateTime", "")
-
                 segments.append({
                     "sourceStationId": source_station,
                     "destinationStationId": destination_station,
@@ -82,8 +82,9 @@ def simplify_edreams_json(input_filepath, output_filepath):
         }
 
         # Split segments into outbound and inbound based on original grouping
-        outbound_keys = itinerary.get("firstSegmentsKeys", [])
-        inbound_keys = itinerary.get("secondSegmentsKeys", [])
+        # (as sets, so each segment is classified with a hash lookup)
+        outbound_keys = frozenset(itinerary.get("firstSegmentsKeys", []))
+        inbound_keys = frozenset(itinerary.get("secondSegmentsKeys", []))
 
         for seg in segments:
             key_repr = f"0,{seg['carrierCode']}{seg['flightCode']}"  # Reconstruct key format
@@ -95,8 +96,8 @@ def simplify_edreams_json(input_filepath, output_filepath):
         simplified_itineraries.append(simplified_itinerary)
 
     # Save simplified JSON
-    with open(output_filepath, "w", encoding="utf-8") as file:
-        json.dump(simplified_itineraries, file, indent=4, ensure_ascii=False)
+    with open(output_filepath, "wb") as file:
+        file.write(orjson.dumps(simplified_itineraries, option=orjson.OPT_INDENT_2))
 
     print(f"Simplified JSON saved to {output_filepath}")
 
@@ -1,12 +1,11 @@
+import os
 import time
-import json
-import re
-import glob
-import numpy as np
-import matplotlib.pyplot as plt
-import csv
+import importlib.util
+import multiprocessing
+import threading
 import brotli  # For Brotli decompression
-import hashlib
+import httpx  # install via: pip install "httpx[http2]"
+import orjson  # install via: pip install orjson
 from seleniumwire import webdriver  # selenium-wire extends Selenium
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
@@ -14,19 +13,22 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 # -----------------------------
 # Helper Functions (Shared)
 # -----------------------------
 def load_json(file_path):
-  with open(file_path, "r", encoding="utf-8") as file:
-    return json.load(file)
+  with open(file_path, "rb") as file:
+    return orjson.loads(file.read())
 
 
 def accept_cookies(driver, timeout=10):
-  """Wait for and click the 'Accept' button in the cookies popup."""
+  """
+  Wait for and click the 'Accept' button in the cookies popup.
+  Returns True only once the button has been clicked.
+  """
   try:
     button = WebDriverWait(driver, timeout).until(
         EC.element_to_be_clickable((
@@ -36,51 +38,168 @@ def accept_cookies(driver, timeout=10):
     )
     button.click()
     print("Cookie acceptance button clicked.")
+    return True
   except Exception as e:
     print("Cookie acceptance button not found/clickable.", e)
+    return False
 
 
 def search_flights(driver, origin, destination, depart_date, return_date=None):
-  """Open the Kiwi.com flight search page and dismiss cookies."""
+  """
+  Open the Kiwi.com flight search page and dismiss cookies. The popup only
+  shows up on the first page a driver loads, so later searches on the same
+  driver skip the wait for it.
+  """
   base_url = "https://www.kiwi.com/en/search/results"
   search_url = f"{base_url}/{origin}/{destination}/{depart_date}"
   if return_date:
     search_url += f"/{return_date}"
   print(f"Navigating to: {search_url}")
+  driver._last_graphql = None
   driver.get(search_url)
-  time.sleep(3)  # Allow page to load
-  accept_cookies(driver)
-  time.sleep(5)  # Wait for initial network requests
+  if not getattr(driver, '_cookies_handled', False):
+    # Waits for the popup itself; retried on the next search if it never
+    # showed up or could not be clicked.
+    driver._cookies_handled = accept_cookies(driver)
+  wait_for_response(driver)  # Wait for the initial results request
 
 
-def get_network_response(driver, target_url):
+def wait_for_response(driver, timeout=15):
   """
-  Iterate over captured network requests (most recent first)
-  to find the final response matching the target URL, decompress if needed,
-  and parse it as JSON.
+  Wait until track_last_response has recorded a response, instead of
+  sleeping a fixed time. Returns False on timeout.
   """
-  for request in reversed(driver.requests):
+  try:
+    WebDriverWait(driver, timeout).until(
+        lambda d: getattr(d, '_last_graphql', None) is not None)
+    return True
+  except TimeoutException:
+    print("Timed out waiting for the network response.")
+    return False
+
+
+def track_last_response(driver, target_url):
+  """
+  Remember the most recent response matching the target URL on the driver,
+  so it can be read back without scanning the captured requests.
+  """
+  driver._last_graphql = None
+
+  def interceptor(request, response):
     if target_url in request.url:
-      if request.response:
-        raw = request.response.body  # bytes
-        encoding = request.response.headers.get('content-encoding', '').lower()
-        if 'br' in encoding:
-          try:
-            decompressed = brotli.decompress(raw)
-            text = decompressed.decode('utf-8', errors='replace')
-          except Exception as e:
-            print("Error decompressing Brotli:", e)
-            continue
-        else:
-          text = raw.decode('utf-8', errors='replace')
-        try:
-          json_data = json.loads(text)
-          return json_data
-        except Exception as e:
-          print("Error parsing JSON:", e)
-          continue
-  print("Target network response not found.")
-  return None
+      driver._last_graphql = (request, response)
+
+  driver.response_interceptor = interceptor
+
+
+def open_output(path):
+  """Open path for a raw, unbuffered binary write and return the descriptor."""
+  return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+
+def write_all(fd, data, chunk_size=1 << 20):
+  """
+  Write data to fd with os.write in chunks of at most chunk_size bytes,
+  retrying on short writes; no text codec or Python-level buffering.
+  """
+  view = memoryview(data)
+  while view:
+    view = view[os.write(fd, view[:chunk_size]):]
+
+
+def save_network_response(driver, output_file, chunk_size=1 << 16):
+  """
+  Write the last response recorded for the target URL by track_last_response
+  to output_file. Brotli bodies are decompressed chunk by chunk straight into
+  the file, so the decoded JSON is never held in memory in full.
+  Returns True if a response was saved.
+  """
+  captured = getattr(driver, '_last_graphql', None)
+  if captured is None:
+    print("Target network response not found.")
+    return False
+  _, response = captured
+  raw = response.body  # bytes
+  encoding = response.headers.get('content-encoding', '').lower()
+  # Written to a side file and renamed into place only once complete, so a
+  # failure never truncates or replaces an earlier good output_file.
+  part_file = output_file + ".part"
+  fd = open_output(part_file)
+  try:
+    if 'br' not in encoding:
+      write_all(fd, raw)
+    else:
+      decompressor = brotli.Decompressor()
+      for start in range(0, len(raw), chunk_size):
+        write_all(fd, decompressor.process(raw[start:start + chunk_size]))
+      if not decompressor.is_finished():
+        raise brotli.error("truncated Brotli stream")
+  except Exception as e:
+    print("Error saving the network response:", e)
+    os.close(fd)
+    os.unlink(part_file)
+    return False
+  os.close(fd)
+  os.replace(part_file, output_file)
+  return True
+
+
+def replay_graphql_pages(driver, output_file, max_pages=50):
+  """
+  Paginate the search at the API level instead of clicking 'Load more'.
+  Takes the GraphQL request the page itself sent (headers, cookies and
+  variables included) and POSTs it again with a growing filter.limit until
+  the number of itineraries stops growing, then writes the last, complete
+  response to output_file. Returns True if a response was saved.
+  """
+  captured = getattr(driver, '_last_graphql', None)
+  if captured is None:
+    print("No GraphQL request captured to replay.")
+    return False
+  request, _ = captured
+  payload = orjson.loads(request.body)
+  search_filter = payload["variables"]["filter"]
+  page_size = search_filter["limit"]
+  # Reuse the browser's headers, but let httpx set the transport ones and
+  # ask only for encodings it decodes natively (no Brotli in Python).
+  skipped_headers = {'host', 'content-length', 'accept-encoding', 'connection'}
+  headers = {name: value for name, value in request.headers.items()
+             if name.lower() not in skipped_headers and not name.startswith(':')}
+  headers['accept-encoding'] = 'gzip, deflate'
+
+  best_body = None
+  best_count = -1
+  with httpx.Client(http2=True, headers=headers, timeout=30) as client:
+    for _ in range(max_pages):
+      # A failed page ends the paging; the pages fetched so far are kept.
+      try:
+        response = client.post(request.url, content=orjson.dumps(payload))
+        response.raise_for_status()
+      except httpx.HTTPError as e:
+        print("Error fetching the next page, keeping the results so far:", e)
+        break
+      itineraries = orjson.loads(response.content)["data"]["returnItineraries"]["itineraries"]
+      if len(itineraries) <= best_count:
+        break
+      best_body, best_count = response.content, len(itineraries)
+      print(f"Fetched {best_count} itineraries.")
+      search_filter["limit"] += page_size
+
+  if best_body is None:
+    return False
+  # Same as save_network_response: write a side file and rename it into
+  # place, so a failed write never leaves a partial output_file.
+  part_file = output_file + ".part"
+  fd = open_output(part_file)
+  try:
+    write_all(fd, best_body)
+  except Exception:
+    os.close(fd)
+    os.unlink(part_file)
+    raise
+  os.close(fd)
+  os.replace(part_file, output_file)
+  return True
 
 
 def click_load_more(driver, timeout=10):
@@ -113,55 +232,153 @@ def no_more_results_displayed(driver, timeout=5):
     return False
 
 
+# -----------------------------
+# Browser Setup (One per Worker)
+# -----------------------------
+def create_driver(driver_path):
+  """
+  Start a selenium-wire Chrome driver from an already installed chromedriver,
+  capturing only the GraphQL endpoint.
+  """
+  target_network_url = "https://api.skypicker.com/umbrella/v2/graphql?featureName=SearchReturnItinerariesQuery"
+
+  options = webdriver.ChromeOptions()
+  # Only the GraphQL JSON is needed: run headless and skip images so neither
+  # Chrome nor the selenium-wire proxy spend time on them.
+  options.add_argument('--headless=new')
+  options.add_argument('--blink-settings=imagesEnabled=false')
+  options.add_argument('--disable-gpu')
+  options.add_argument('--disable-dev-shm-usage')
+  options.add_argument('--no-sandbox')
+  options.add_experimental_option('prefs', {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.cookies': 1,
+  })
+  # You can add further options here if needed.
+  # Keep only the most recent captured requests in memory instead of every
+  # body the page ever loaded.
+  seleniumwire_options = {
+    'request_storage': 'memory',
+    'request_storage_max_size': 50,
+    # Trackers connect directly instead of going through the proxy at all.
+    'exclude_hosts': [
+      'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+      'facebook.net', 'facebook.com', 'hotjar.com', 'bat.bing.com',
+    ],
+  }
+  driver = webdriver.Chrome(
+      service=ChromeService(driver_path),
+      options=options,
+      seleniumwire_options=seleniumwire_options
+  )
+  # Only capture the GraphQL endpoint; images, scripts and trackers pass through.
+  driver.scopes = [r'.*api\.skypicker\.com/umbrella/v2/graphql.*']
+  track_last_response(driver, target_network_url)
+  return driver
+
+
 # -----------------------------
 # Main Search Function for One Itinerary
 # -----------------------------
-def search_and_save(itinerary, output_prefix):
+def search_and_save(driver, itinerary, output_prefix):
   """
-  Runs a flight search for a single itinerary using Selenium,
-  clicks 'Load more' until no more results appear,
-  then captures the network response from the target URL and writes it to a JSON file.
+  Runs a flight search for a single itinerary using Selenium, then replays
+  the captured GraphQL request directly until no more results appear and
+  writes the final response to a JSON file. Falls back to clicking
+  'Load more' in the browser if the replay fails. Returns the path of the
+  saved file, or None if nothing was saved.
 
   Parameters:
+    driver: a driver from create_driver, reused across itineraries
     itinerary: a tuple (origin, destination, depart_date, return_date)
     output_prefix: a string to prefix output filenames (e.g. based on itinerary)
   """
   origin, destination, depart_date = itinerary[:3]
   return_date = itinerary[3] if len(itinerary) > 3 else None
 
-  target_network_url = "https://api.skypicker.com/umbrella/v2/graphql?featureName=SearchReturnItinerariesQuery"
-
-  options = webdriver.ChromeOptions()
-  # You can add further options here if needed.
-  driver = webdriver.Chrome(
-      service=ChromeService(ChromeDriverManager().install()),
-      options=options
-  )
+  # Drop anything captured by the previous itinerary on this driver.
+  del driver.requests
 
+  search_flights(driver, origin, destination, depart_date, return_date)
+  output_file = f"{output_prefix}_final_response.json"
+  # The browser is only needed to bootstrap the session (cookies, tokens and
+  # the first request); paging over the API skips re-rendering every page.
   try:
-    search_flights(driver, origin, destination, depart_date, return_date)
-    while True:
-      if no_more_results_displayed(driver):
-        print("Ending loop: no more results available.")
-        break
-      driver.requests.clear()
-      if not click_load_more(driver):
-        print("Unable to click 'Load more', ending loop.")
-        break
-      time.sleep(7)
-    final_json = get_network_response(driver, target_network_url)
-    if final_json is not None:
-      output_file = f"{output_prefix}_final_response.json"
-      with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(final_json, f, indent=2, ensure_ascii=False)
+    if replay_graphql_pages(driver, output_file):
       print(f"Final JSON response saved to {output_file}")
-    else:
-      print("Final network response not found.")
+      return output_file
+  except Exception as e:
+    print("Error replaying the GraphQL request, using 'Load more' instead:", e)
+
+  while True:
+    if no_more_results_displayed(driver):
+      print("Ending loop: no more results available.")
+      break
+    del driver.requests
+    # Keep the last capture until the click actually brings a new one, so a
+    # failed click or a timeout still saves the results loaded so far.
+    previous = driver._last_graphql
+    driver._last_graphql = None
+    if not click_load_more(driver):
+      driver._last_graphql = previous
+      print("Unable to click 'Load more', ending loop.")
+      break
+    if not wait_for_response(driver) and driver._last_graphql is None:
+      driver._last_graphql = previous
+  if save_network_response(driver, output_file):
+    print(f"Final JSON response saved to {output_file}")
+    return output_file
+  print("Final network response not found.")
+  return None
+
+
+def search_batch(jobs, driver_path, results=None):
+  """
+  Worker entry point: start one Chrome and run every (itinerary, output_prefix)
+  job of the batch on it, so the browser start-up is paid once per worker.
+  Each saved response is put on the results queue as (output_prefix, path)
+  as soon as its itinerary finishes.
+  """
+  driver = create_driver(driver_path)
+  try:
+    for itinerary, output_prefix in jobs:
+      try:
+        output_file = search_and_save(driver, itinerary, output_prefix)
+        if results is not None and output_file:
+          results.put((output_prefix, output_file))
+      except Exception as e:
+        print(f"An error occurred during the search for {output_prefix}:", e)
   finally:
     time.sleep(5)
     driver.quit()
 
 
+# -----------------------------
+# Downstream Processing (Overlapped with the Searches)
+# -----------------------------
+def load_kiwi_mapper():
+  """Import simplify_kiwi_json from mapper-kiwi.py next to this script."""
+  path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapper-kiwi.py")
+  spec = importlib.util.spec_from_file_location("mapper_kiwi", path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module.simplify_kiwi_json
+
+
+def simplify_as_completed(results):
+  """
+  Consumer thread: simplify each saved Kiwi response as soon as its search
+  finishes, while the remaining searches are still waiting on the network.
+  Stops at the None sentinel.
+  """
+  simplify_kiwi_json = load_kiwi_mapper()
+  for output_prefix, response_file in iter(results.get, None):
+    try:
+      simplify_kiwi_json(response_file, f"{output_prefix}_simplified.json")
+    except Exception as e:
+      print(f"An error occurred while simplifying {response_file}:", e)
+
+
 # -----------------------------
 # Run Multiple Searches in Parallel
 # -----------------------------
@@ -183,17 +400,35 @@ itineraries = [
   #("dubai-united-arab-emirates", "toronto-ontario-canada", "2026-04-01", "2026-04-10")
 ]
 
-# We'll use ThreadPoolExecutor to run up to 10 searches concurrently.
-with ThreadPoolExecutor(max_workers=10) as executor:
-  futures = []
-  for idx, itin in enumerate(itineraries, start=1):
-    # Create a unique output prefix for each itinerary.
-    output_prefix = f"itinerary_{idx}"
-    future = executor.submit(search_and_save, itin, output_prefix)
-    futures.append(future)
-  # Optionally, wait for all tasks to complete.
-  for future in as_completed(futures):
+# Run the searches in up to 4 worker processes, one Chrome each.
+if __name__ == "__main__":
+  # Install chromedriver once here; workers only receive its path, so they
+  # neither repeat the version check nor race on the first download.
+  driver_path = ChromeDriverManager().install()
+
+  # Separate processes keep the brotli/JSON work of each browser off a
+  # shared GIL; capped at 4 so the searches don't saturate the network.
+  max_workers = min(os.cpu_count() or 1, 4, len(itineraries))
+  # Create a unique output prefix for each itinerary, then deal the
+  # itineraries round-robin into one batch per worker.
+  jobs = [(itin, f"itinerary_{idx}") for idx, itin in enumerate(itineraries, start=1)]
+  batches = [jobs[i::max_workers] for i in range(max_workers)]
+
+  # Workers report every saved response on a shared queue; a consumer thread
+  # simplifies them as they arrive instead of after the slowest search.
+  with multiprocessing.Manager() as manager:
+    results = manager.Queue()
+    consumer = threading.Thread(target=simplify_as_completed, args=(results,))
+    consumer.start()
     try:
-      future.result()
-    except Exception as e:
-      print("An error occurred during a search:", e)
\ No newline at end of file
+      with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(search_batch, batch, driver_path, results) for batch in batches]
+        # Wait for all tasks to complete, reporting failures as they happen.
+        for future in as_completed(futures):
+          try:
+            future.result()
+          except Exception as e:
+            print("An error occurred during a search:", e)
+    finally:
+      results.put(None)
+      consumer.join()
\ No newline at end of file
@@ -1,4 +1,4 @@
-import requests
+import httpx  # install via: pip install "httpx[http2]"
 
 # API endpoint
 url = "https://api.skypicker.com/umbrella/v2/graphql?featureName=SearchReturnItinerariesQuery"
@@ -61,8 +61,13 @@ payload = {
     "query": introspection_query
 }
 
-# Send the POST request
-response = requests.post(url, json=payload, headers=headers)
+# Send the POST request over one shared HTTP/2 client, so any further queries
+# reuse the same TLS connection instead of a new handshake each time
+# (with the same explicit timeout as replay_graphql_pages; httpx's 5 s default
+# is too short for a search)
+with httpx.Client(http2=True, headers=headers, timeout=30,
+                  limits=httpx.Limits(max_keepalive_connections=20)) as client:
+    response = client.post(url, json=payload)
 
 # Print the response
 if response.status_code == 200:
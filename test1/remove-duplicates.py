@@ -1,27 +1,28 @@
-import json
+import ijson  # install via: pip install ijson
+import orjson  # install via: pip install orjson
 import sys
 
 def remove_duplicates(input_file, output_file):
     """
     Removes duplicate itinerary entries from the JSON file based on the 'id' field.
+    Entries are streamed from the input and only the first one seen for each id
+    is kept, already encoded, so the full parsed list is never held in memory.
     """
     try:
-        with open(input_file, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        seen = set()
+        seen_add = seen.add
+        cleaned_data = []
+        append = cleaned_data.append
+        with open(input_file, 'rb') as file:
+            for entry in ijson.items(file, "item", use_float=True):
+                itinerary_id = entry.get("id")
+                if itinerary_id and itinerary_id not in seen:
+                    seen_add(itinerary_id)
+                    append(orjson.dumps(entry))
 
-        # Use a dictionary to store unique itineraries
-        unique_itineraries = {}
-        for entry in data:
-            itinerary_id = entry.get("id")
-            if itinerary_id and itinerary_id not in unique_itineraries:
-                unique_itineraries[itinerary_id] = entry
-
-        # Convert dictionary values back to a list
-        cleaned_data = list(unique_itineraries.values())
-
-        # Write the cleaned data to the output file
-        with open(output_file, 'w', encoding='utf-8') as file:
-            json.dump(cleaned_data, file, indent=4, ensure_ascii=False)
+        # Write the cleaned data to the output file in a single write
+        with open(output_file, 'wb') as file:
+            file.write(b"[" + b",".join(cleaned_data) + b"]")
 
         print(f"Duplicates removed. Output saved to {output_file} with {len(cleaned_data)} unique itineraries.")
     except Exception as e:
@@ -1,5 +1,5 @@
+import os
 import time
-import json
 import brotli  # For Brotli decompression
 
 from seleniumwire import webdriver  # selenium-wire extends Selenium
@@ -11,6 +11,20 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
 
 
+_driver_path = None
+
+
+def get_driver_path():
+  """
+  Install chromedriver on first use and reuse its path afterwards, so the
+  webdriver-manager version check and cache lookup run once per process.
+  """
+  global _driver_path
+  if _driver_path is None:
+    _driver_path = ChromeDriverManager().install()
+  return _driver_path
+
+
 def accept_cookies(driver, timeout=10):
   """Wait for and click the 'Accept' button in the cookies popup."""
   try:
@@ -34,40 +48,74 @@ def search_flights(driver, origin, destination, depart_date, return_date=None):
     search_url += f"/{return_date}"
 
   print(f"Navigating to: {search_url}")
+  driver._last_graphql = None
   driver.get(search_url)
-  time.sleep(3)  # Allow page to load
-  accept_cookies(driver)
-  time.sleep(5)  # Wait for initial network requests
+  accept_cookies(driver)  # Waits for the popup itself
+  wait_for_response(driver)  # Wait for the initial results request
+
+
+def wait_for_response(driver, timeout=15):
+  """
+  Wait until track_last_response has recorded a response, instead of
+  sleeping a fixed time. Returns False on timeout.
+  """
+  try:
+    WebDriverWait(driver, timeout).until(
+        lambda d: getattr(d, '_last_graphql', None) is not None)
+    return True
+  except TimeoutException:
+    print("Timed out waiting for the network response.")
+    return False
 
 
-def get_network_response(driver, target_url):
+def track_last_response(driver, target_url):
   """
-  Iterate over captured network requests in reverse order (most recent first)
-  to find the final response matching the target URL, decompress if needed,
-  and parse it as JSON.
+  Remember the most recent response matching the target URL on the driver,
+  so it can be read back without scanning the captured requests.
   """
-  for request in reversed(driver.requests):
+  driver._last_graphql = None
+
+  def interceptor(request, response):
     if target_url in request.url:
-      if request.response:
-        raw = request.response.body  # bytes
-        encoding = request.response.headers.get('content-encoding', '').lower()
-        if 'br' in encoding:
-          try:
-            decompressed = brotli.decompress(raw)
-            text = decompressed.decode('utf-8', errors='replace')
-          except Exception as e:
-            print("Error decompressing Brotli:", e)
-            continue
-        else:
-          text = raw.decode('utf-8', errors='replace')
-        try:
-          json_data = json.loads(text)
-          return json_data
-        except Exception as e:
-          print("Error parsing JSON:", e)
-          continue
-  print("Target network response not found.")
-  return None
+      driver._last_graphql = (request, response)
+
+  driver.response_interceptor = interceptor
+
+
+def save_network_response(driver, output_file, chunk_size=1 << 16):
+  """
+  Write the last response recorded for the target URL by track_last_response
+  to output_file. Brotli bodies are decompressed chunk by chunk straight into
+  the file, so the decoded JSON is never held in memory in full.
+  Returns True if a response was saved.
+  """
+  captured = getattr(driver, '_last_graphql', None)
+  if captured is None:
+    print("Target network response not found.")
+    return False
+  _, response = captured
+  raw = response.body  # bytes
+  encoding = response.headers.get('content-encoding', '').lower()
+  # Written to a side file and renamed into place only once complete, so a
+  # failure never truncates or replaces an earlier good output_file.
+  part_file = output_file + ".part"
+  try:
+    with open(part_file, 'wb') as f:
+      if 'br' not in encoding:
+        f.write(raw)
+      else:
+        decompressor = brotli.Decompressor()
+        for start in range(0, len(raw), chunk_size):
+          f.write(decompressor.process(raw[start:start + chunk_size]))
+        if not decompressor.is_finished():
+          raise brotli.error("truncated Brotli stream")
+  except Exception as e:
+    print("Error saving the network response:", e)
+    if os.path.exists(part_file):
+      os.unlink(part_file)
+    return False
+  os.replace(part_file, output_file)
+  return True
 
 
 def click_load_more(driver, timeout=10):
@@ -111,10 +159,36 @@ def main():
 
   # Initialize the Chrome WebDriver (using selenium-wire).
   options = webdriver.ChromeOptions()
+  # Only the GraphQL JSON is needed: run headless and skip images so neither
+  # Chrome nor the selenium-wire proxy spend time on them.
+  options.add_argument('--headless=new')
+  options.add_argument('--blink-settings=imagesEnabled=false')
+  options.add_argument('--disable-gpu')
+  options.add_argument('--disable-dev-shm-usage')
+  options.add_argument('--no-sandbox')
+  options.add_experimental_option('prefs', {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.cookies': 1,
+  })
+  # Keep only the most recent captured requests in memory instead of every
+  # body the page ever loaded.
+  seleniumwire_options = {
+    'request_storage': 'memory',
+    'request_storage_max_size': 50,
+    # Trackers connect directly instead of going through the proxy at all.
+    'exclude_hosts': [
+      'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+      'facebook.net', 'facebook.com', 'hotjar.com', 'bat.bing.com',
+    ],
+  }
   driver = webdriver.Chrome(
-      service=ChromeService(ChromeDriverManager().install()),
-      options=options
+      service=ChromeService(get_driver_path()),
+      options=options,
+      seleniumwire_options=seleniumwire_options
   )
+  # Only capture the GraphQL endpoint; images, scripts and trackers pass through.
+  driver.scopes = [r'.*api\.skypicker\.com/umbrella/v2/graphql.*']
+  track_last_response(driver, target_network_url)
 
   try:
     for itinerary in itineraries:
@@ -130,27 +204,32 @@ def main():
           print("Ending loop: no more results available.")
           break
 
-        # Clear previous network requests to capture only new ones.
-        driver.requests.clear()
+        # Clear previous network requests to capture only new ones (driver.requests
+        # returns a copy, so only del empties the underlying storage).
+        del driver.requests
+        # Keep the last capture until the click actually brings a new one, so
+        # a failed click or a timeout still saves the results loaded so far.
+        previous = driver._last_graphql
+        driver._last_graphql = None
 
         if not click_load_more(driver):
+          driver._last_graphql = previous
           print("Unable to click 'Load more', ending loop.")
           break
 
-        time.sleep(7)  # Wait for new network request(s) to fire.
+        # Wait for the new network request to answer.
+        if not wait_for_response(driver) and driver._last_graphql is None:
+          driver._last_graphql = previous
 
       # After the loop, get the final (aggregated) response.
-      final_json = get_network_response(driver, target_network_url)
-      if final_json is not None:
-        output_file = "final_response.json"
-        try:
-          with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(final_json, f, indent=2, ensure_ascii=False)
+      output_file = "final_response.json"
+      try:
+        if save_network_response(driver, output_file):
           print(f"Final JSON response saved to {output_file}")
-        except Exception as e:
-          print("Error writing final JSON to file:", e)
-      else:
-        print("Final network response not found.")
+        else:
+          print("Final network response not found.")
+      except Exception as e:
+        print("Error writing final JSON to file:", e)
   finally:
     time.sleep(5)
     driver.quit()
@@ -1,6 +1,5 @@
-import json
+import orjson  # install via: pip install orjson
 import matplotlib.pyplot as plt
-import re
 import numpy as np
 
 # Helper function to extract segments and carriers from the composed id.
@@ -9,19 +8,43 @@ def extract_segments_and_carriers(itinerary_id):
     Assumes itinerary_id is a string starting with "s{num}-c{num}".
     For example, "s3-c1-KL-3390-KL-6149-KL-6126" indicates 3 segments and 1 carrier.
     """
-    # Use regex to extract the number after 's' and 'c'
-    match = re.match(r's(\d+)-c(\d+)', itinerary_id)
-    if match:
-        segments = int(match.group(1))
-        carriers = int(match.group(2))
-        return segments, carriers
-    else:
+    # The prefix is fixed, so slice around the first two dashes instead of
+    # running the regex engine on every id.
+    sep1 = itinerary_id.find('-')
+    if sep1 < 2 or itinerary_id[0] != 's' or itinerary_id[sep1 + 1:sep1 + 2] != 'c':
         return None, None
+    sep2 = itinerary_id.find('-', sep1 + 2)
+    if sep2 == -1:
+        sep2 = len(itinerary_id)
+    segments, carriers = itinerary_id[1:sep1], itinerary_id[sep1 + 2:sep2]
+    if not (segments.isdigit() and carriers.isdigit()):
+        return None, None
+    return int(segments), int(carriers)
+
+# Parse the segment and carrier counts of every id in one pass.
+def segments_and_carriers(data):
+    """
+    Returns two int arrays (segments, carriers), skipping entries whose id
+    does not start with "s{num}-c{num}".
+    """
+    pairs = [extract_segments_and_carriers(entry["id"]) for entry in data]
+    counts = np.array([pair for pair in pairs if pair[0] is not None], dtype=np.int32).reshape(-1, 2)
+    return counts[:, 0], counts[:, 1]
 
 # Load JSON files
 def load_json(file_path):
-    with open(file_path, "r") as file:
-        return json.load(file)
+    with open(file_path, "rb") as file:
+        return orjson.loads(file.read())
+
+# Hash every id once into int64 for sort-based NumPy set operations.
+def unique_hashed_ids(data):
+    """
+    Returns (hashes, ids): the sorted unique int64 hashes of the entries' ids
+    and the matching id strings. hash() only has to be stable within one run.
+    """
+    ids = [entry["id"] for entry in data]
+    hashes, first_index = np.unique(np.fromiter((hash(i) for i in ids), dtype=np.int64, count=len(ids)), return_index=True)
+    return hashes, np.array(ids, dtype=object)[first_index]
 
 # File paths
 kiwi_file_path = "kiwi-simplified.json"
@@ -31,23 +54,29 @@ edreams_file_path = "edreams-simplified.json"
 kiwi_data = load_json(kiwi_file_path)
 edreams_data = load_json(edreams_file_path)
 
-# Create hash sets for itineraries (using id field)
-kiwi_itinerary_ids = {entry["id"] for entry in kiwi_data}
-edreams_itinerary_ids = {entry["id"] for entry in edreams_data}
+# Create hashed id arrays for itineraries (using id field)
+kiwi_hashes, kiwi_itinerary_ids = unique_hashed_ids(kiwi_data)
+edreams_hashes, edreams_itinerary_ids = unique_hashed_ids(edreams_data)
+kiwi_in_edreams = np.isin(kiwi_hashes, edreams_hashes, assume_unique=True)
+edreams_in_kiwi = np.isin(edreams_hashes, kiwi_hashes, assume_unique=True)
 
 # Find repeated itineraries
-repeated_itineraries = kiwi_itinerary_ids.intersection(edreams_itinerary_ids)
+repeated_itineraries = kiwi_itinerary_ids[kiwi_in_edreams]
 
 # Find missing itineraries
-missing_in_edreams = kiwi_itinerary_ids - edreams_itinerary_ids
-missing_in_kiwi = edreams_itinerary_ids - kiwi_itinerary_ids
+missing_in_edreams = kiwi_itinerary_ids[~kiwi_in_edreams]
+missing_in_kiwi = edreams_itinerary_ids[~edreams_in_kiwi]
+
+# Parse prices once (price field assumed to be convertible to float)
+edreams_prices = np.fromiter((float(entry["price"]) for entry in edreams_data), dtype=np.float64, count=len(edreams_data))
+kiwi_prices = np.fromiter((float(entry["price"]) for entry in kiwi_data), dtype=np.float64, count=len(kiwi_data))
 
-# Find the cheapest itineraries (price field assumed to be convertible to float)
-cheapest_edreams_price = min(float(entry["price"]) for entry in edreams_data)
-cheapest_kiwi_price = min(float(entry["price"]) for entry in kiwi_data)
+# Find the cheapest itineraries
+cheapest_edreams_price = float(edreams_prices.min())
+cheapest_kiwi_price = float(kiwi_prices.min())
 
 # Get Kiwi itineraries cheaper than the cheapest eDreams itinerary
-cheaper_kiwi_itineraries = [entry["id"] for entry in kiwi_data if float(entry["price"]) < cheapest_edreams_price]
+cheaper_kiwi_itineraries = [kiwi_data[i]["id"] for i in np.flatnonzero(kiwi_prices < cheapest_edreams_price)]
 
 # Print results
 print("ANALYSIS OF BCN-DPS RT")
@@ -61,14 +90,14 @@ print(f"Cheapest Kiwi price: {cheapest_kiwi_price}")
 print(f"Kiwi itineraries cheaper than cheapest eDreams: {len(cheaper_kiwi_itineraries)}")
 
 # ----------------- Price Distribution Graph -----------------
-# Extract prices for plotting
-edreams_prices = [float(entry["price"]) for entry in edreams_data]
-kiwi_prices = [float(entry["price"]) for entry in kiwi_data]
-
-plt.figure(figsize=(10, 6))
+# Bin both datasets once with shared edges and draw the counts as stairs.
 bins = 30  # Adjust number of bins as needed
-plt.hist(edreams_prices, bins=bins, color='blue', alpha=0.6, label='eDreams')
-plt.hist(kiwi_prices, bins=bins, color='green', alpha=0.6, label='Kiwi')
+edges = np.histogram_bin_edges(np.concatenate((edreams_prices, kiwi_prices)), bins=bins)
+edreams_price_counts, _ = np.histogram(edreams_prices, bins=edges)
+kiwi_price_counts, _ = np.histogram(kiwi_prices, bins=edges)
+plt.figure(figsize=(10, 6))
+plt.stairs(edreams_price_counts, edges, fill=True, color='blue', alpha=0.6, label='eDreams')
+plt.stairs(kiwi_price_counts, edges, fill=True, color='green', alpha=0.6, label='Kiwi')
 plt.xlabel('Price')
 plt.ylabel('Frequency')
 plt.title('Price Distribution: eDreams (blue) vs Kiwi (green)')
@@ -79,24 +108,16 @@ plt.savefig("price_distribution.png")
 plt.show()
 
 # ----------------- Segments Distribution Graph -----------------
-# Extract segments from the itinerary id for each entry
-edreams_segments = []
-for entry in edreams_data:
-    segments, _ = extract_segments_and_carriers(entry["id"])
-    if segments is not None:
-        edreams_segments.append(segments)
-
-kiwi_segments = []
-for entry in kiwi_data:
-    segments, _ = extract_segments_and_carriers(entry["id"])
-    if segments is not None:
-        kiwi_segments.append(segments)
+# Extract segments and carriers from the itinerary id for each entry
+edreams_segments, edreams_carriers = segments_and_carriers(edreams_data)
+kiwi_segments, kiwi_carriers = segments_and_carriers(kiwi_data)
 
+all_segments = np.concatenate((edreams_segments, kiwi_segments))
+# Integer counts: one bincount per dataset, with edges centred on each value
+edges = np.arange(all_segments.min(), all_segments.max() + 2) - 0.5
 plt.figure(figsize=(10, 6))
-# Create bins based on the range of segments
-bins = range(min(edreams_segments + kiwi_segments), max(edreams_segments + kiwi_segments) + 2)
-plt.hist(edreams_segments, bins=bins, color='blue', alpha=0.6, label='eDreams', align='left')
-plt.hist(kiwi_segments, bins=bins, color='green', alpha=0.6, label='Kiwi', align='left')
+plt.stairs(np.bincount(edreams_segments - all_segments.min(), minlength=len(edges) - 1), edges, fill=True, color='blue', alpha=0.6, label='eDreams')
+plt.stairs(np.bincount(kiwi_segments - all_segments.min(), minlength=len(edges) - 1), edges, fill=True, color='green', alpha=0.6, label='Kiwi')
 plt.xlabel('Number of Segments')
 plt.ylabel('Frequency')
 plt.title('Segments Distribution per Itinerary: eDreams (blue) vs Kiwi (green)')
@@ -104,29 +125,16 @@ plt.legend()
 plt.grid(True)
 plt.tight_layout()
 plt.savefig("segments_distribution.png")
-plt.xticks(np.arange(min(edreams_segments + kiwi_segments),
-                      max(edreams_segments + kiwi_segments) + 2, 1))
+plt.xticks(np.arange(all_segments.min(), all_segments.max() + 2, 1))
 plt.show()
 
 # ----------------- Carriers Distribution Graph -----------------
-# Extract carriers count from the itinerary id for each entry
-edreams_carriers = []
-for entry in edreams_data:
-    _, carriers = extract_segments_and_carriers(entry["id"])
-    if carriers is not None:
-        edreams_carriers.append(carriers)
-
-kiwi_carriers = []
-for entry in kiwi_data:
-    _, carriers = extract_segments_and_carriers(entry["id"])
-    if carriers is not None:
-        kiwi_carriers.append(carriers)
-
+all_carriers = np.concatenate((edreams_carriers, kiwi_carriers))
+# Integer counts: one bincount per dataset, with edges centred on each value
+edges = np.arange(all_carriers.min(), all_carriers.max() + 2) - 0.5
 plt.figure(figsize=(10, 6))
-# Create bins based on the range of carriers count
-bins = range(min(edreams_carriers + kiwi_carriers), max(edreams_carriers + kiwi_carriers) + 2)
-plt.hist(edreams_carriers, bins=bins, color='blue', alpha=0.6, label='eDreams', align='left')
-plt.hist(kiwi_carriers, bins=bins, color='green', alpha=0.6, label='Kiwi', align='left')
+plt.stairs(np.bincount(edreams_carriers - all_carriers.min(), minlength=len(edges) - 1), edges, fill=True, color='blue', alpha=0.6, label='eDreams')
+plt.stairs(np.bincount(kiwi_carriers - all_carriers.min(), minlength=len(edges) - 1), edges, fill=True, color='green', alpha=0.6, label='Kiwi')
 plt.xlabel('Number of Carriers per Itinerary')
 plt.ylabel('Frequency')
 plt.title('Carriers Distribution per Itinerary: eDreams (blue) vs Kiwi (green)')
@@ -136,21 +144,21 @@ plt.tight_layout()
 plt.savefig("carriers_distribution.png")
 plt.show()
 
-# Optional: Save the sets to files
-with open("kiwi_itineraries.json", "w") as file:
-    json.dump(list(kiwi_itinerary_ids), file, indent=4)
+# Optional: Save the sets to files (compact JSON; these are intermediate files)
+with open("kiwi_itineraries.json", "wb") as file:
+    file.write(orjson.dumps(kiwi_itinerary_ids.tolist()))
 
-with open("edreams_itineraries.json", "w") as file:
-    json.dump(list(edreams_itinerary_ids), file, indent=4)
+with open("edreams_itineraries.json", "wb") as file:
+    file.write(orjson.dumps(edreams_itinerary_ids.tolist()))
 
-with open("repeated_itineraries.json", "w") as file:
-    json.dump(list(repeated_itineraries), file, indent=4)
+with open("repeated_itineraries.json", "wb") as file:
+    file.write(orjson.dumps(repeated_itineraries.tolist()))
 
-with open("missing_in_edreams.json", "w") as file:
-    json.dump(list(missing_in_edreams), file, indent=4)
+with open("missing_in_edreams.json", "wb") as file:
+    file.write(orjson.dumps(missing_in_edreams.tolist()))
 
-with open("missing_in_kiwi.json", "w") as file:
-    json.dump(list(missing_in_kiwi), file, indent=4)
+with open("missing_in_kiwi.json", "wb") as file:
+    file.write(orjson.dumps(missing_in_kiwi.tolist()))
 
-with open("cheaper_kiwi_itineraries.json", "w") as file:
-    json.dump(list(cheaper_kiwi_itineraries), file, indent=4)
\ No newline at end of file
+with open("cheaper_kiwi_itineraries.json", "wb") as file:
+    file.write(orjson.dumps(list(cheaper_kiwi_itineraries)))
\ No newline at end of file
@@ -1,6 +1,6 @@
 import time
-import json
 import brotli  # For Brotli decompression
+import orjson  # install via: pip install orjson
 
 from seleniumwire import webdriver  # selenium-wire extends Selenium
 from selenium.webdriver.chrome.service import Service as ChromeService
@@ -11,6 +11,20 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
 
 
+_driver_path = None
+
+
+def get_driver_path():
+  """
+  Install chromedriver on first use and reuse its path afterwards, so the
+  webdriver-manager version check and cache lookup run once per process.
+  """
+  global _driver_path
+  if _driver_path is None:
+    _driver_path = ChromeDriverManager().install()
+  return _driver_path
+
+
 def accept_cookies(driver, timeout=10):
   """Wait for and click the 'Accept' button in the cookies popup."""
   try:
@@ -35,62 +49,75 @@ def search_flights(driver, origin, destination, depart_date, return_date=None):
 
   print(f"Navigating to: {search_url}")
   driver.get(search_url)
-  time.sleep(3)  # Allow page to load
-  accept_cookies(driver)
-  time.sleep(5)  # Wait for initial network requests
+  accept_cookies(driver)  # Waits for the popup itself
+  wait_for_response(driver)  # Wait for the initial results request
 
 
-def get_network_response(driver, target_url):
+def wait_for_response(driver, target_url="featureName=SearchReturnItinerariesQuery", timeout=15):
+  """
+  Wait until a response for the target URL has been captured, instead of
+  sleeping a fixed time. Returns False on timeout.
+  """
+  try:
+    WebDriverWait(driver, timeout).until(
+        lambda d: any(target_url in req.url and req.response for req in d.requests))
+    return True
+  except TimeoutException:
+    print("Timed out waiting for the network response.")
+    return False
+
+
+def _decode(req):
+  """Decompress a captured response body if needed and parse it as JSON."""
+  raw = req.response.body
+  encoding = req.response.headers.get('content-encoding', '').lower()
+  if 'br' in encoding:
+    raw = brotli.decompress(raw)
+  return orjson.loads(raw)
+
+
+def matching_requests(driver, target_url):
+  """Return the captured requests for the target URL that have a response."""
+  return [req for req in driver.requests if
+          target_url in req.url and req.response]
+
+
+def get_network_response(driver, target_url, fallback_requests=()):
   """
   Iterate over captured network requests, filter by target URL,
   reverse the order (most recent first), and select the best response
-  based on the number of results.
+  based on the number of results. Each candidate is decoded at most once.
+  If nothing matching is captured, fallback_requests (the matches kept from
+  before the storage was last cleared) are used instead.
   """
   # Filter requests matching the target URL
-  filtered_requests = [req for req in driver.requests if
-                       target_url in req.url and req.response]
+  filtered_requests = matching_requests(driver, target_url) or list(fallback_requests)
 
   # Reverse the filtered list
   filtered_requests.reverse()
 
-  # Select the best request based on results
-  selected_request = None
-
   if len(filtered_requests) > 1:
-    first_request = filtered_requests[0]
-    second_request = filtered_requests[1]
-
-    # Extract JSON from first request to check the number of results
+    # Decode the first request to check the number of results
     try:
-      raw = first_request.response.body
-      encoding = first_request.response.headers.get('content-encoding',
-                                                    '').lower()
-      if 'br' in encoding:
-        raw = brotli.decompress(raw)
-      text = raw.decode('utf-8', errors='replace')
-      json_data = json.loads(text)
-
-      # If first request has less than 26 results, pick the second as it seems Kiwi is returning the first results otherwise
-      if len(json_data.get("results", [])) < 26:
-        selected_request = second_request
-      else:
-        selected_request = first_request
+      json_data = _decode(filtered_requests[0])
     except Exception as e:
       print("Error processing first request:", e)
       return None
+
+    # If first request has at least 26 results it is the one; otherwise pick
+    # the second, as it seems Kiwi is returning the first results then
+    if len(json_data.get("results", [])) >= 26:
+      return json_data
+    selected_request = filtered_requests[1]
   elif filtered_requests:
     selected_request = filtered_requests[0]  # Only one request, take it
+  else:
+    selected_request = None
 
   # Process and return the selected request
   if selected_request:
     try:
-      raw = selected_request.response.body
-      encoding = selected_request.response.headers.get('content-encoding',
-                                                       '').lower()
-      if 'br' in encoding:
-        raw = brotli.decompress(raw)
-      text = raw.decode('utf-8', errors='replace')
-      return json.loads(text)
+      return _decode(selected_request)
     except Exception as e:
       print("Error parsing JSON:", e)
 
@@ -139,10 +166,35 @@ def main():
 
   # Initialize the Chrome WebDriver (using selenium-wire).
   options = webdriver.ChromeOptions()
+  # Only the GraphQL JSON is needed: run headless and skip images so neither
+  # Chrome nor the selenium-wire proxy spend time on them.
+  options.add_argument('--headless=new')
+  options.add_argument('--blink-settings=imagesEnabled=false')
+  options.add_argument('--disable-gpu')
+  options.add_argument('--disable-dev-shm-usage')
+  options.add_argument('--no-sandbox')
+  options.add_experimental_option('prefs', {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.cookies': 1,
+  })
+  # Keep only the most recent captured requests in memory instead of every
+  # body the page ever loaded.
+  seleniumwire_options = {
+    'request_storage': 'memory',
+    'request_storage_max_size': 50,
+    # Trackers connect directly instead of going through the proxy at all.
+    'exclude_hosts': [
+      'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+      'facebook.net', 'facebook.com', 'hotjar.com', 'bat.bing.com',
+    ],
+  }
   driver = webdriver.Chrome(
-      service=ChromeService(ChromeDriverManager().install()),
-      options=options
+      service=ChromeService(get_driver_path()),
+      options=options,
+      seleniumwire_options=seleniumwire_options
   )
+  # Only capture the GraphQL endpoint; images, scripts and trackers pass through.
+  driver.scopes = [r'.*api\.skypicker\.com/umbrella/v2/graphql.*']
 
   try:
     for itinerary in itineraries:
@@ -153,6 +205,9 @@ def main():
       search_flights(driver, origin, destination, depart_date, return_date)
 
       # Loop: click "Load more" until "No More Results" is present.
+      # Matches kept from before the last clear, so a failed click or a
+      # response that never arrives still leaves the results loaded so far.
+      previous_requests = []
       #i = 0
       while True:
         #i = i+1
@@ -162,22 +217,24 @@ def main():
           print("Ending loop: no more results available.")
           break
 
-        # Clear previous network requests to capture only new ones.
-        driver.requests.clear()
+        # Clear previous network requests to capture only new ones (driver.requests
+        # returns a copy, so only del empties the underlying storage).
+        previous_requests = matching_requests(driver, target_network_url) or previous_requests
+        del driver.requests
 
         if not click_load_more(driver):
           print("Unable to click 'Load more', ending loop.")
           break
 
-        time.sleep(7)  # Wait for new network request(s) to fire.
+        wait_for_response(driver, target_network_url)  # Wait for the new network request to answer.
 
       # After the loop, get the final (aggregated) response.
-      final_json = get_network_response(driver, target_network_url)
+      final_json = get_network_response(driver, target_network_url, previous_requests)
       if final_json is not None:
         output_file = "kiwi-response.json"
         try:
-          with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(final_json, f, indent=2, ensure_ascii=False)
+          with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(final_json))
           print(f"Final JSON response saved to {output_file}")
         except Exception as e:
           print("Error writing final JSON to file:", e)
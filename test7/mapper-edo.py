@@ -1,149 +1,295 @@
 import os
-import json
-import re
-import glob
-import numpy as np
-import matplotlib.pyplot as plt
-import csv
-import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from operator import itemgetter
+from sys import intern
+import orjson  # install via: pip install orjson
 
 
-def generate_edreams_itinerary_id(itinerary, segments, section_count):
+def generate_edreams_itinerary_id(segment_ids, section_count, id_fragments):
   """
   Generate a unique itinerary ID based on:
   "s{#sections}-c{#unique carriers}" concatenated with each segment's carrier and flight code.
-  'section_count' is the total number of sections.
+  'segment_ids' may be any iterable; it is walked once.
+  'section_count' is the total number of sections; 'id_fragments' maps each
+  segment ID to its precomputed ("-{carrier}-{flight}..." part of the ID,
+  set of carrier codes), as a dict or an index_by_id table.
+  The readable format is kept (no digest) because the IDs must match the
+  ones mapper-kiwi.py builds, and the analysis parses the "s{n}-c{n}" prefix.
   """
-  carriers = {seg["carrierCode"] for seg in segments}
-  carrier_count = len(carriers)
+  # One pass over the segments collects both the ID parts and the carriers.
+  parts = []
+  carriers = set()
+  add_part = parts.append
+  add_carriers = carriers.update
+  dense = type(id_fragments) is list
+  for seg_id in segment_ids:
+    # A table only answers for non-negative int IDs; anything else is unknown.
+    if dense and (type(seg_id) is not int or seg_id < 0):
+      continue
+    try:
+      entry = id_fragments[seg_id]
+    except (KeyError, IndexError):
+      continue
+    if entry is not None:
+      fragment, seg_carriers = entry
+      add_part(fragment)
+      add_carriers(seg_carriers)
+  return f"s{section_count}-c{len(carriers)}" + "".join(parts)
+
 
-  # Concatenate carrier and flight codes from each processed segment.
-  segment_details = [f"-{seg['carrierCode']}-{seg['flightCode']}" for seg in
-                     segments]
+def load_json(file_path):
+  with open(file_path, "rb") as file:
+    return orjson.loads(file.read())
 
-  raw_id = f"s{section_count}-c{carrier_count}" + "".join(segment_details)
-  # Optionally, to compact the ID:
-  # itinerary_id = hashlib.md5(raw_id.encode()).hexdigest()[:16]
-  itinerary_id = raw_id
-  return itinerary_id
 
+def write_bytes(path, data):
+  """
+  Write data to path with os.write straight from the encoded buffer,
+  retrying on short writes; no Python-level file buffer in between.
+  """
+  fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+  try:
+    view = memoryview(data)
+    while view:
+      view = view[os.write(fd, view):]
+  finally:
+    os.close(fd)
 
-def load_json(file_path):
-  with open(file_path, "r", encoding="utf-8") as file:
-    return json.load(file)
 
+# Segment record used when a legend entry has none.
+EMPTY_SEGMENT = {}
 
-def process_segments(segment_ids, segment_map, section_map, location_map):
+# Row used for a section id missing from the legend.
+MISSING_SECTION = ("", "", "", "", "")
+
+# Reads the section fields a row is built from, in row order, in one C call.
+get_section_fields = itemgetter("from", "to", "departureDate", "arrivalDate", "flightCode")
+
+
+def decode_segment(section_ids, seg_carrier, section_rows):
+  """
+  Build the processed dictionaries (one per section) of a single segment,
+  using its pre-resolved section rows and the segment carrier as fallback.
+  Segments are shared across itineraries, so each is decoded only once.
   """
-  Given a list of segment IDs, lookup each segment in segment_map.
-  For each segment, process all section IDs in its "sections" list (inside the "segment" key).
-  For each section, retrieve detailed flight info from section_map and the corresponding IATA codes via location_map.
-  Returns a list of processed segment dictionaries (one per section).
+  # Carrier fallback for sections without a flight code, the same for the
+  # whole segment.
+  seg_carrier_default = intern(str(seg_carrier)) if seg_carrier else ""
+  # IATA codes, times and flight code of each section, already resolved when
+  # the row was built. The carrier code is the first two letters of the
+  # flight code, or the segment carrier as fallback; it is interned because
+  # the same few carriers repeat across thousands of sections.
+  return [{
+      "sourceStationId": departure_iata,
+      "destinationStationId": arrival_iata,
+      "departureLocalTime": departure_time,
+      "arrivalLocalTime": arrival_time,
+      "flightCode": flight_code[2:],
+      "carrierCode": intern(flight_code[:2]) if flight_code else seg_carrier_default
+    } for departure_iata, arrival_iata, departure_time, arrival_time, flight_code
+    in map(section_rows.get, section_ids, repeat(MISSING_SECTION))]
+
+
+def process_segments(segment_ids, segment_processed):
+  """
+  Given a list of segment IDs, concatenate the processed dictionaries that
+  decode_segment built for each of them in segment_processed (a dict or an
+  index_by_id table).
+  Returns (processed, section_count): a list of processed segment dictionaries
+  (one per section) and the number of sections walked.
   """
   processed = []
+  # Bind the per-call lookup once.
+  extend = processed.extend
+  dense = type(segment_processed) is list
   for seg_id in segment_ids:
-    seg_obj = segment_map.get(seg_id)
-    if not seg_obj:
+    # A table only answers for non-negative int IDs; anything else is unknown.
+    if dense and (type(seg_id) is not int or seg_id < 0):
       continue
-    # Retrieve the section IDs from the segment object.
-    section_ids = seg_obj.get("segment", {}).get("sections", [])
-    if not section_ids:
+    try:
+      rows = segment_processed[seg_id]
+    except (KeyError, IndexError):
       continue
-    # Process each section in the segment.
-    for section_id in section_ids:
-      sec_obj = section_map.get(section_id, {})
-      sec = sec_obj.get("section", {})
-      # Extract departure and arrival geo node IDs.
-      departure_geo = sec.get("from")
-      arrival_geo = sec.get("to")
-      departure_time = sec.get("departureDate", "")
-      arrival_time = sec.get("arrivalDate", "")
-      flight_code = sec.get("flightCode", "")
-      # Derive carrier code: try using first two letters of flight code or fallback to seg carrier.
-      carrier_code = flight_code[:2] if flight_code else ""
-      if not carrier_code and seg_obj.get("segment", {}).get("carrier"):
-        carrier_code = str(seg_obj["segment"]["carrier"])
-      # Lookup IATA codes via location_map.
-      departure_iata = location_map.get(departure_geo, "")
-      arrival_iata = location_map.get(arrival_geo, "")
-
-      processed.append({
-        "sourceStationId": departure_iata,
-        "destinationStationId": arrival_iata,
-        "departureLocalTime": departure_time,
-        "arrivalLocalTime": arrival_time,
-        "flightCode": flight_code[2:],
-        "carrierCode": carrier_code
-      })
-  return processed
-
+    if rows:
+      extend(rows)
+  return processed, len(processed)
 
-def simplify_edreams_json(input_filepath, output_filepath):
-  # Load original edreams JSON.
-  data = load_json(input_filepath)
-  search_results = data.get("itinerarySearchResults", {})
-  itineraries = search_results.get("itineraryResults", [])
 
-  # Mapping information is inside the "legend" object.
-  legend = search_results.get("legend", {})
-  segment_results = legend.get("segmentResults", [])
-  section_results = legend.get("sectionResults", [])
-  locations = legend.get("locations", [])
+def index_by_id(mapping):
+  """
+  Return 'mapping' as a list indexed by its keys when they are dense
+  non-negative ints (the legend numbers segments 0..N-1), with None in any
+  gaps. Any other mapping is returned unchanged. Either way the result is
+  read with mapping[seg_id], catching KeyError/IndexError for unknown IDs;
+  a table is only read for non-negative int IDs, so a negative or non-int
+  ID is skipped (as a dict lookup would) instead of indexing from the end
+  or raising TypeError.
+  """
+  if not mapping or not all(type(key) is int and key >= 0 for key in mapping):
+    return mapping
+  size = max(mapping) + 1
+  if size > 2 * len(mapping):
+    return mapping
+  table = [None] * size
+  for key, value in mapping.items():
+    table[key] = value
+  return table
 
-  # Build mapping dictionaries.
-  segment_map = {seg["id"]: seg for seg in segment_results}
-  section_map = {sec["id"]: sec for sec in section_results}
-  location_map = {loc["geoNodeId"]: loc["iataCode"] for loc in locations}
 
+def build_itineraries(itineraries, segment_processed, id_fragments, currency):
+  """
+  Hot core of the mapper: turn the raw itineraries into simplified ones using
+  only the maps prepared from the legend. It reads no globals, so the loop
+  can be moved into a compiled extension as-is if it ever needs to be.
+  """
   simplified_itineraries = []
+  # Bind the per-itinerary calls once.
+  append = simplified_itineraries.append
+  process = process_segments
+  generate_id = generate_edreams_itinerary_id
 
   for itinerary in itineraries:
     # Retrieve raw segment IDs for outbound and inbound.
     outbound_ids = itinerary.get("firstSegments", [])
     inbound_ids = itinerary.get("secondSegments", [])
-    raw_segment_ids = outbound_ids + inbound_ids
-
-    # Compute total number of sections across raw segments.
-    section_count = 0
-    for seg_id in raw_segment_ids:
-      seg_obj = segment_map.get(seg_id)
-      if seg_obj:
-        sections = seg_obj.get("segment", {}).get("sections", [])
-        section_count += len(sections)
-
-    # Process outbound and inbound segments.
-    outbound_segments = process_segments(outbound_ids, segment_map, section_map,
-                                         location_map)
-    inbound_segments = process_segments(inbound_ids, segment_map, section_map,
-                                        location_map)
-
-    # Combine processed segments for itinerary ID generation.
-    all_segments = outbound_segments + inbound_segments
-    itinerary_id = generate_edreams_itinerary_id(itinerary, all_segments,
-                                                 section_count)
+
+    # Process outbound and inbound segments, counting their sections on the way.
+    outbound_segments, outbound_sections = process(outbound_ids, segment_processed)
+    inbound_segments, inbound_sections = process(inbound_ids, segment_processed)
+    section_count = outbound_sections + inbound_sections
+
+    # Walk both legs' segment IDs for itinerary ID generation without
+    # copying them into a combined list.
+    itinerary_id = generate_id(chain(outbound_ids, inbound_ids), section_count, id_fragments)
 
     # Extract price details (assuming itinerary["price"]["sortPrice"]).
     price_details = itinerary.get("price", {}).get("sortPrice", 0.0)
 
-    simplified_itinerary = {
+    append({
       "id": itinerary_id,
       "price": price_details,
-      "currency": search_results.get("priceCurrency", "EUR"),
+      "currency": currency,
       "outbound": outbound_segments,
       "inbound": inbound_segments
-    }
-    simplified_itineraries.append(simplified_itinerary)
+    })
+  return simplified_itineraries
+
+
+# Itineraries per worker task when the build is split across processes;
+# responses smaller than two chunks are built in-process.
+PARALLEL_CHUNK_SIZE = 2000
+
+# Maps a worker process builds its chunks from, set once by _init_worker.
+_worker_maps = None
+
+
+def _init_worker(segment_processed, id_fragments, currency):
+  global _worker_maps
+  _worker_maps = (segment_processed, id_fragments, currency)
+
+
+def _build_chunk(chunk):
+  return build_itineraries(chunk, *_worker_maps)
+
+
+def build_itineraries_parallel(itineraries, segment_processed, id_fragments, currency):
+  """
+  Same result as build_itineraries, but large responses are split into
+  chunks built in separate processes. The maps are handed to each worker
+  once through the pool initializer rather than pickled with every chunk.
+  """
+  workers = min(os.cpu_count() or 1, len(itineraries) // PARALLEL_CHUNK_SIZE)
+  if workers < 2:
+    return build_itineraries(itineraries, segment_processed, id_fragments, currency)
+
+  chunks = [itineraries[i:i + PARALLEL_CHUNK_SIZE]
+            for i in range(0, len(itineraries), PARALLEL_CHUNK_SIZE)]
+  with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                           initargs=(segment_processed, id_fragments, currency)) as executor:
+    # map() yields the chunks in order, so the output order is unchanged.
+    return list(chain.from_iterable(executor.map(_build_chunk, chunks)))
+
+
+def simplify_edreams_json(input_filepath, output_filepath):
+  # Load original edreams JSON.
+  data = load_json(input_filepath)
+  search_results = data.get("itinerarySearchResults", {})
+  itineraries = search_results.get("itineraryResults", [])
+
+  # Mapping information is inside the "legend" object.
+  legend = search_results.get("legend", {})
+  segment_results = legend.get("segmentResults", [])
+  section_results = legend.get("sectionResults", [])
+  locations = legend.get("locations", [])
+
+  # Build mapping dictionaries.
+  # segment id -> (section ids, carrier), resolved once per segment.
+  seg_sections = {}
+  for seg in segment_results:
+    # Dereference the segment record once; a missing or null record (or
+    # section list) yields an empty segment instead of a fresh default dict.
+    inner = seg.get("segment") or EMPTY_SEGMENT
+    seg_sections[seg["id"]] = (inner.get("sections") or (), inner.get("carrier"))
+  location_map = {loc["geoNodeId"]: loc["iataCode"] for loc in locations}
+  # section id -> (departure IATA, arrival IATA, departure time, arrival time,
+  # flight code): one flat row per section, with the geo node ids resolved
+  # through location_map here rather than on every itinerary that uses it.
+  # The fields are gathered into columns first so both IATA columns are
+  # resolved in one map() pass each.
+  section_fields = []
+  add_fields = section_fields.append
+  for sec in section_results:
+    section = sec.get("section", {})
+    try:
+      departure_geo, arrival_geo, departure_time, arrival_time, flight_code = get_section_fields(section)
+    except KeyError:
+      # Incomplete section: fall back to the per-field defaults.
+      departure_geo, arrival_geo = section.get("from"), section.get("to")
+      departure_time = section.get("departureDate", "")
+      arrival_time = section.get("arrivalDate", "")
+      flight_code = section.get("flightCode", "")
+    add_fields((sec["id"], departure_geo, arrival_geo, departure_time, arrival_time, flight_code))
+  section_rows = {}
+  if section_fields:
+    ids, departure_geos, arrival_geos, departure_times, arrival_times, flight_codes = zip(*section_fields)
+    get_iata = location_map.get
+    section_rows = dict(zip(ids, zip(map(get_iata, departure_geos, repeat("")),
+                                     map(get_iata, arrival_geos, repeat("")),
+                                     departure_times, arrival_times, flight_codes)))
+  # segment id -> its processed section dictionaries, decoded once here and
+  # shared by every itinerary that uses the segment (nothing mutates them).
+  segment_processed = {seg_id: decode_segment(section_ids, seg_carrier, section_rows)
+                       for seg_id, (section_ids, seg_carrier) in seg_sections.items()}
+  # segment id -> (its part of the itinerary ID, its carrier codes), built
+  # once per segment.
+  id_fragments = {seg_id: ("".join([f"-{seg['carrierCode']}-{seg['flightCode']}" for seg in rows]),
+                           frozenset([seg["carrierCode"] for seg in rows]))
+                  for seg_id, rows in segment_processed.items()}
+  # Both maps are probed for every segment of every itinerary; with dense
+  # legend IDs a list index replaces the dict hash and probe.
+  segment_processed = index_by_id(segment_processed)
+  id_fragments = index_by_id(id_fragments)
+  currency = search_results.get("priceCurrency", "EUR")
+  # The maps above and `itineraries` hold everything the mapper needs, so
+  # release the rest of the parsed response (fare details, full section
+  # records) before building the output.
+  del data, search_results, legend, segment_results, section_results, locations, section_fields
+
+  simplified_itineraries = build_itineraries_parallel(itineraries, segment_processed, id_fragments, currency)
 
-  # Save simplified JSON.
-  with open(output_filepath, "w", encoding="utf-8") as file:
-    json.dump(simplified_itineraries, file, indent=4, ensure_ascii=False)
+  # Save simplified JSON. Compact: the file is only read back by the
+  # analysis scripts, which load it as a single JSON array.
+  write_bytes(output_filepath, orjson.dumps(simplified_itineraries))
 
   print(f"Simplified JSON saved to {output_filepath}")
 
 
-# Define paths.
-input_file = "edreams-response.json"
-output_file = "edreams-simplified.json"
+# Guarded so worker processes can import this module without rerunning it.
+if __name__ == "__main__":
+  # Define paths.
+  input_file = "edreams-response.json"
+  output_file = "edreams-simplified.json"
 
-# Run the mapper script.
-simplify_edreams_json(input_file, output_file)
\ No newline at end of file
+  # Run the mapper script.
+  simplify_edreams_json(input_file, output_file)
\ No newline at end of file